@@ -2,11 +2,16 @@
 
 # Standard library imports
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
 
-input_grammar = Grammar(
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, check_format, parse_with_fallback
+
+input_grammar = cached_grammar(
     r"""
     input = elf+
     elf = (number "\n"?)+ "\n"?
@@ -14,6 +19,8 @@ input_grammar = Grammar(
     """
 )
 
+input_format = re.compile(r"[0-9]+(?:\n\n?[0-9]+)*")
+
 
 class InputVisitor(NodeVisitor):
     def visit_elf(self, node, visited_children):
@@ -28,13 +35,27 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
     parsed_input = input_grammar.parse(puzzle_input)
     typed_input = InputVisitor().visit(parsed_input)
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with str.split."""
+    check_format(input_format, puzzle_input)
+    return [
+        [int(number) for number in elf.split("\n")]
+        for elf in puzzle_input.split("\n\n")
+    ]
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def part1(data):
     """Solve part 1."""
     max_calories = 0
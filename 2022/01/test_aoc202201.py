@@ -32,6 +32,9 @@ def test_parse_example1(example1):
         [10000],
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().strip()
+    assert aoc202201.parse_fast(puzzle_input) == aoc202201.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
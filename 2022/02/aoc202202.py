@@ -2,10 +2,17 @@
 
 # Standard library imports
 import pathlib
+import re
 import sys
 
 from enum import Enum
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+round_format = re.compile(r"([A-CX-Z]) +([A-CX-Z])")
 
 
 class Choice(Enum):
@@ -26,9 +33,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = round+
         round = choice " "+ choice "\n"?
@@ -45,6 +52,16 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    return [list(round) for round in match_lines(round_format, puzzle_input)]
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def opponent_choice(choice):
     if choice == "A":
         return Choice.ROCK
@@ -26,6 +26,9 @@ def test_parse_example1(example1):
     """Test that input is parsed properly."""
     assert example1 == [["A", "Y"], ["B", "X"], ["C", "Z"]]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().strip()
+    assert aoc202202.parse_fast(puzzle_input) == aoc202202.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
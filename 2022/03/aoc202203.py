@@ -2,9 +2,16 @@
 
 # Standard library imports
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, check_format, parse_with_fallback
+
+input_format = re.compile(r"[a-zA-Z]+(?:\n[a-zA-Z]+)*")
 
 
 class InputVisitor(NodeVisitor):
@@ -16,9 +23,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = rucksack+
         rucksack = ~r"[a-zA-Z]+" "\n"?
@@ -31,6 +38,17 @@ def parse_data(puzzle_input):
     return transformed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with str.split."""
+    check_format(input_format, puzzle_input)
+    return puzzle_input.split("\n")
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def item_priority(item):
     if item.islower():
         return ord(item) - 96
@@ -2,9 +2,16 @@
 
 # Standard library imports
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+pair_format = re.compile(r"([1-9][0-9]*)-([1-9][0-9]*),([1-9][0-9]*)-([1-9][0-9]*)")
 
 
 class InputVisitor(NodeVisitor):
@@ -23,9 +30,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = pair+
         pair = section "," section "\n"?
@@ -40,6 +47,19 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    return [
+        ((int(start1), int(end1)), (int(start2), int(end2)))
+        for start1, end1, start2, end2 in match_lines(pair_format, puzzle_input)
+    ]
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def part1(data):
     """Solve part 1."""
     overlapping_sections = 0
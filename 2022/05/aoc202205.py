@@ -3,12 +3,29 @@
 # Standard library imports
 import copy
 import pathlib
+import re
 import sys
 
 from dataclasses import dataclass
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
 from typing import List
 
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import (
+    FastParseError,
+    cached_grammar,
+    check_format,
+    match_lines,
+    parse_with_fallback,
+)
+
+crate_row_format = re.compile(r"(?:\[[A-Z]\]|   )(?: (?:\[[A-Z]\]|   ))* ?")
+stack_numbers_format = re.compile(r"(?: [1-9][0-9]*  ?)+")
+instruction_format = re.compile(
+    r"move ([1-9][0-9]*) from ([1-9][0-9]*) to ([1-9][0-9]*)"
+)
+
 
 @dataclass
 class Data:
@@ -65,9 +82,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = crate_row+ stack_numbers "\n" instruction+
         crate_row = (crate / empty)+ "\n"
@@ -87,6 +104,37 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with compiled regular expressions and str.split."""
+    diagram, _, instruction_lines = puzzle_input.partition("\n\n")
+    *crate_rows, stack_numbers = diagram.split("\n")
+    if not crate_rows:
+        raise FastParseError("No crates above the stack numbers")
+
+    check_format(stack_numbers_format, stack_numbers)
+    stacks = [[] for _ in range(len(stack_numbers.split()))]
+
+    for crate_row in reversed(crate_rows):
+        check_format(crate_row_format, crate_row)
+        for stack_number, crate in enumerate(crate_row[1::4]):
+            if crate != " ":
+                stacks[stack_number].append(crate)
+
+    instructions = [
+        (int(count), int(start) - 1, int(end) - 1)
+        for count, start, end in match_lines(
+            instruction_format, instruction_lines.removesuffix("\n")
+        )
+    ]
+
+    return Data(stacks, instructions)
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def part1(data):
     """Solve part 1."""
     stacks = copy.deepcopy(data.stacks)
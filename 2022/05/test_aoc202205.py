@@ -29,6 +29,9 @@ def test_parse_example1(example1):
         instructions=[(1, 1, 0), (3, 0, 2), (2, 1, 0), (1, 0, 1)],
     )
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text()
+    assert aoc202205.parse_fast(puzzle_input) == aoc202205.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
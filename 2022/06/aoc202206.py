@@ -1,6 +1,8 @@
 """AoC 6, 2022."""
 
 # Standard library imports
+import itertools
+import mmap
 import pathlib
 import sys
 
@@ -10,22 +12,59 @@ def parse_data(puzzle_input):
     return puzzle_input
 
 
-def is_distinct(sequence):
-    return len(set(sequence)) == len(sequence)
+def find_marker(chars, window_size):
+    """Find the position after the first window of distinct characters.
+
+    chars can be any iterable of characters (or bytes), which is only
+    iterated once, so signals can be streamed with read_chunks.
+    """
+    last_seen = {}
+    window_start = 0
+
+    for i, char in enumerate(chars):
+        # Shrink the window to start after the previous occurrence of char
+        if last_seen.get(char, -1) >= window_start:
+            window_start = last_seen[char] + 1
+        last_seen[char] = i
+
+        if i + 1 - window_start == window_size:
+            return i + 1
+
+    return None
+
+
+def read_chunks(stream, chunk_size=1 << 16):
+    """Read a file, socket.makefile() etc. chunk by chunk."""
+    while chunk := stream.read(chunk_size):
+        yield chunk
+
+
+def find_marker_in_stream(stream, window_size, chunk_size=1 << 16):
+    """Find a marker in a stream, keeping only one chunk in memory."""
+    chunks = read_chunks(stream, chunk_size)
+    return find_marker(itertools.chain.from_iterable(chunks), window_size)
+
+
+def find_marker_in_file(path, window_size):
+    """Find a marker in a file without reading the whole file in memory."""
+    if pathlib.Path(path).stat().st_size == 0:
+        # Empty files cannot be memory mapped
+        return None
+
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as signal:
+            with memoryview(signal) as signal_bytes:
+                return find_marker(signal_bytes, window_size)
 
 
 def part1(data):
     """Solve part 1."""
-    for i in range(4, len(data)):
-        if is_distinct(data[i - 4 : i]):
-            return i
+    return find_marker(data, 4)
 
 
 def part2(data):
     """Solve part 2."""
-    for i in range(14, len(data)):
-        if is_distinct(data[i - 14 : i]):
-            return i
+    return find_marker(data, 14)
 
 
 def solve(puzzle_input):
@@ -1,6 +1,7 @@
 """Tests for AoC 6, 2022."""
 
 # Standard library imports
+import io
 import pathlib
 
 # Third party imports
@@ -37,6 +38,13 @@ def test_part2_example1(example1):
     assert aoc202206.part2(example1) == 19
 
 
+def test_find_marker_in_stream():
+    """Test finding markers in a stream read in small chunks."""
+    stream = io.BytesIO((PUZZLE_DIR / "example1.txt").read_bytes())
+    assert aoc202206.find_marker_in_stream(stream, 14, chunk_size=3) == 19
+    assert aoc202206.find_marker_in_file(PUZZLE_DIR / "example1.txt", 4) == 7
+
+
 @pytest.mark.skip(reason="Not implemented")
 def test_part2_example2(example2):
     """Test part 2 on example input."""
@@ -2,9 +2,18 @@
 
 # Standard library imports
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import FastParseError, cached_grammar, match_lines, parse_with_fallback
+
+line_format = re.compile(
+    r"\$ cd ([a-z.]+)|\$ (ls)|dir ([a-z.]+)|([1-9][0-9]*) ([a-z.]+)"
+)
 
 
 class InputVisitor(NodeVisitor):
@@ -41,9 +50,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = "$ cd /\n" (cd / ls)+
         cd = "$ cd " name "\n"?
@@ -58,7 +67,39 @@ def parse_data(puzzle_input):
     parsed_input = input_grammar.parse(puzzle_input)
     typed_input = InputVisitor().visit(parsed_input)
 
-    return parse_file_tree(typed_input)
+    return typed_input
+
+
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    first_line, _, lines = puzzle_input.partition("\n")
+    if first_line != "$ cd /":
+        raise FastParseError("Input does not start in the root directory")
+
+    commands = []
+
+    for cd, ls, dirname, size, filename in match_lines(line_format, lines):
+        if cd or ls:
+            if commands and commands[-1][0] == "list" and not commands[-1][1]:
+                raise FastParseError("Empty directory listing")
+            commands.append(("cd", cd) if cd else ("list", []))
+        elif not commands or commands[-1][0] != "list":
+            raise FastParseError("Directory listing without ls")
+        elif dirname:
+            commands[-1][1].append(("dir", dirname))
+        else:
+            commands[-1][1].append(("file", filename, int(size)))
+
+    if not commands or commands[-1] == ("list", []):
+        raise FastParseError("Empty directory listing")
+
+    return commands
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    commands = parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+    return parse_file_tree(commands)
 
 
 def parse_file_tree(data):
@@ -31,6 +31,9 @@ def test_parse_example1(example1):
         "d": {"j": 4060174, "d.log": 8033020, "d.ext": 5626152, "k": 7214296},
     }
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202207.parse_fast(puzzle_input) == aoc202207.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
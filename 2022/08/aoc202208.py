@@ -2,9 +2,16 @@
 
 import numpy as np
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, check_format, parse_with_fallback
+
+input_format = re.compile(r"[0-9]+(?:\n[0-9]+)*")
 
 
 class InputVisitor(NodeVisitor):
@@ -23,9 +30,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = grid_row+
         grid_row = digit+ "\n"?
@@ -36,102 +43,74 @@ def parse_data(puzzle_input):
     parsed_input = input_grammar.parse(puzzle_input)
     typed_input = InputVisitor().visit(parsed_input)
 
-    return np.array(typed_input, dtype=np.int8)
-
-
-def part1(data):
-    """Solve part 1."""
-    visibility_grid = np.zeros(data.shape, dtype=np.int8)
-
-    # Top
-    for x in range(data.shape[1]):
-        current_height = -1
-
-        for y in range(data.shape[0]):
-            if data[y, x] <= current_height:
-                continue
+    return typed_input
 
-            visibility_grid[y, x] = 1
-            current_height = data[y, x]
 
-    # Bottom
-    for x in range(data.shape[1]):
-        current_height = -1
+def parse_fast(puzzle_input):
+    """Parse input with str.split."""
+    check_format(input_format, puzzle_input)
+    return [[int(digit) for digit in row] for row in puzzle_input.split("\n")]
 
-        for y in range(data.shape[0] - 1, -1, -1):
-            if data[y, x] <= current_height:
-                continue
 
-            visibility_grid[y, x] = 1
-            current_height = data[y, x]
-
-    # Left
-    for y in range(data.shape[0]):
-        current_height = -1
-
-        for x in range(data.shape[1]):
-            if data[y, x] <= current_height:
-                continue
-
-            visibility_grid[y, x] = 1
-            current_height = data[y, x]
-
-    # Right
-    for y in range(data.shape[0]):
-        current_height = -1
-
-        for x in range(data.shape[1] - 1, -1, -1):
-            if data[y, x] <= current_height:
-                continue
+def parse_data(puzzle_input):
+    """Parse input."""
+    grid_rows = parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+    return np.array(grid_rows, dtype=np.int8)
 
-            visibility_grid[y, x] = 1
-            current_height = data[y, x]
 
-    return visibility_grid.sum()
+def visible_from_left(grid):
+    # A tree is visible if it is taller than the running maximum before it,
+    # accumulating along contiguous rows is much faster than along columns
+    grid = np.ascontiguousarray(grid)
+    blocking_height = np.full_like(grid, -1)
+    np.maximum.accumulate(grid[:, :-1], axis=1, out=blocking_height[:, 1:])
+    return grid > blocking_height
 
 
-def tree_score(data, tree_y, tree_x):
-    scores = np.array([0, 0, 0, 0], dtype=np.int32)
-    tree_height = data[tree_y, tree_x]
+def visible_from_top(grid):
+    # Keep the running maximum of the rows above, one whole row at a time
+    visible = np.empty(grid.shape, dtype=bool)
+    blocking_height = np.full(grid.shape[1], -1, dtype=grid.dtype)
 
-    # Up
-    for y in range(tree_y - 1, -1, -1):
-        scores[0] += 1
+    for y, row in enumerate(grid):
+        np.greater(row, blocking_height, out=visible[y])
+        np.maximum(blocking_height, row, out=blocking_height)
 
-        if data[y, tree_x] >= tree_height:
-            break
+    return visible
 
-    # Down
-    for y in range(tree_y + 1, data.shape[0]):
-        scores[1] += 1
 
-        if data[y, tree_x] >= tree_height:
-            break
+def part1(data):
+    """Solve part 1."""
+    visibility_grid = visible_from_left(data)
+    visibility_grid |= visible_from_left(data[:, ::-1])[:, ::-1]
+    visibility_grid |= visible_from_top(data)
+    visibility_grid |= visible_from_top(data[::-1])[::-1]
 
-    # Left
-    for x in range(tree_x - 1, -1, -1):
-        scores[2] += 1
+    return np.count_nonzero(visibility_grid)
 
-        if data[tree_y, x] >= tree_height:
-            break
 
-    # Right
-    for x in range(tree_x + 1, data.shape[1]):
-        scores[3] += 1
+def viewing_distance_left(grid):
+    # Heights are 0-9, so keep for every row the index of the last tree that
+    # blocks the view of each height, the edge at index 0 blocks everything
+    viewing_distance = np.zeros(grid.shape, dtype=np.int64)
+    blocking_index = np.zeros((grid.shape[0], 10), dtype=np.int64)
+    rows = np.arange(grid.shape[0])
+    heights = np.arange(10)
 
-        if data[tree_y, x] >= tree_height:
-            break
+    for x in range(grid.shape[1]):
+        column = grid[:, x]
+        viewing_distance[:, x] = x - blocking_index[rows, column]
+        blocking_index[heights <= column[:, np.newaxis]] = x
 
-    return scores.prod()
+    return viewing_distance
 
 
 def part2(data):
     """Solve part 2."""
-    tree_scores = np.zeros(data.shape, dtype=np.int32)
-
-    for y in range(data.shape[0]):
-        for x in range(data.shape[1]):
-            tree_scores[y, x] = tree_score(data, y, x)
+    tree_scores = viewing_distance_left(data)
+    tree_scores *= viewing_distance_left(data[:, ::-1])[:, ::-1]
+    tree_scores *= viewing_distance_left(data.T).T
+    tree_scores *= viewing_distance_left(data[::-1].T).T[::-1]
 
     return tree_scores.max()
 
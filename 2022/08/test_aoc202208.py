@@ -36,6 +36,9 @@ def test_parse_example1(example1):
         ],
     )
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202208.parse_fast(puzzle_input) == aoc202208.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -1,10 +1,18 @@
 """AoC 9, 2022."""
 
 # Standard library imports
+from array import array
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+instruction_format = re.compile(r"([UDLR]) ([1-9][0-9]*)")
 
 
 class InputVisitor(NodeVisitor):
@@ -22,9 +30,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = instruction+
         instruction = direction " " integer "\n"?
@@ -39,85 +47,145 @@ def parse_data(puzzle_input):
     return typed_input
 
 
-def move_head(head, direction):
-    head_x, head_y = head
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    return [
+        (direction, int(count))
+        for direction, count in match_lines(instruction_format, puzzle_input)
+    ]
 
-    match direction:
-        case "U":
-            head_y -= 1
-        case "D":
-            head_y += 1
-        case "L":
-            head_x -= 1
-        case "R":
-            head_x += 1
 
-    return (head_x, head_y)
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
 
 
-def move_tail(head, tail):
-    head_x, head_y = head
-    tail_x, tail_y = tail
+DIRECTIONS = {"U": (0, -1), "D": (0, 1), "L": (-1, 0), "R": (1, 0)}
 
-    diff_x = head_x - tail_x
-    diff_y = head_y - tail_y
+# Largest bounding box of the head that is tracked with a dense bitmap
+MAX_BITMAP_CELLS = 1 << 27
 
-    match (abs(diff_x), abs(diff_y)):
-        case (0, 2):
-            tail_y += diff_y // 2
-        case (2, 0):
-            tail_x += diff_x // 2
-        case (1, 2):
-            tail_x += diff_x
-            tail_y += diff_y // 2
-        case (2, 1):
-            tail_x += diff_x // 2
-            tail_y += diff_y
-        case (2, 2):
-            tail_x += diff_x // 2
-            tail_y += diff_y // 2
-        case _:
-            pass
 
-    return (tail_x, tail_y)
+def rope_bounds(data):
+    """Bounding box of the head, no knot can leave it."""
+    x, y = 0, 0
+    min_x, min_y, max_x, max_y = 0, 0, 0, 0
 
+    for direction, count in data:
+        step_x, step_y = DIRECTIONS[direction]
+        x += step_x * count
+        y += step_y * count
+        min_x, min_y = min(min_x, x), min(min_y, y)
+        max_x, max_y = max(max_x, x), max(max_y, y)
 
-def part1(data):
-    """Solve part 1."""
-    head = (0, 0)
-    tail = (0, 0)
-    trail = set()
+    return (min_x, min_y, max_x, max_y)
 
-    for instruction in data:
-        direction, count = instruction
 
-        for _ in range(count):
-            head = move_head(head, direction)
-            tail = move_tail(head, tail)
-            trail.add(tail)
+class Trail:
+    """Visited positions in a dense bitmap over the bounds, or in a set if
+    the bounds are too large for a bitmap."""
 
-    return len(trail)
+    def __init__(self, bounds):
+        self.min_x, self.min_y, max_x, max_y = bounds
+        self.width = max_x - self.min_x + 1
+        cells = self.width * (max_y - self.min_y + 1)
 
+        if cells <= MAX_BITMAP_CELLS:
+            self.bitmap = bytearray(cells)
+            self.positions = None
+        else:
+            self.bitmap = None
+            self.positions = set()
 
-def part2(data, rope_len=10):
-    """Solve part 2."""
-    rope = [(0, 0) for _ in range(rope_len)]
-    trail = set()
+    def add(self, x, y):
+        index = (y - self.min_y) * self.width + (x - self.min_x)
 
-    for instruction in data:
-        direction, count = instruction
+        if self.bitmap is not None:
+            self.bitmap[index] = 1
+        else:
+            self.positions.add(index)
 
-        for _ in range(count):
-            rope[0] = move_head(rope[0], direction)
+    def add_line(self, x, y, step_x, step_y, count):
+        """Add count positions after (x, y) on a line in the step direction."""
+        if count <= 0:
+            return
 
-            for i in range(1, rope_len):
-                rope[i] = move_tail(rope[i - 1], rope[i])
+        stride = step_y * self.width + step_x
+        first = (y + step_y - self.min_y) * self.width + (x + step_x - self.min_x)
+        last = first + stride * (count - 1)
+        indices = range(min(first, last), max(first, last) + 1, abs(stride))
+
+        if self.bitmap is not None:
+            self.bitmap[indices.start : indices.stop : indices.step] = b"\x01" * count
+        else:
+            self.positions.update(indices)
+
+    def __len__(self):
+        if self.bitmap is not None:
+            return len(self.bitmap) - self.bitmap.count(0)
+        return len(self.positions)
 
-            trail.add(rope[-1])
+
+def simulate_rope(data, rope_len):
+    """Count the positions visited by the tail of the rope."""
+    knots_x = array("i", [0] * rope_len)
+    knots_y = array("i", [0] * rope_len)
+    trail = Trail(rope_bounds(data))
+
+    # A single knot rope is its own tail and leaves the start on the first move
+    if data and rope_len > 1:
+        trail.add(0, 0)
+
+    for direction, count in data:
+        step_x, step_y = DIRECTIONS[direction]
+
+        for step in range(count):
+            knots_x[0] += step_x
+            knots_y[0] += step_y
+            straight = True
+
+            for i in range(1, rope_len):
+                diff_x = knots_x[i - 1] - knots_x[i]
+                diff_y = knots_y[i - 1] - knots_y[i]
+
+                # The rest of the rope does not move if this knot does not
+                if -1 <= diff_x <= 1 and -1 <= diff_y <= 1:
+                    break
+
+                # Move one step towards the previous knot, i.e. by the sign
+                move_x = (diff_x > 0) - (diff_x < 0)
+                move_y = (diff_y > 0) - (diff_y < 0)
+                knots_x[i] += move_x
+                knots_y[i] += move_y
+
+                if move_x != step_x or move_y != step_y:
+                    straight = False
+            else:
+                trail.add(knots_x[-1], knots_y[-1])
+
+                if straight:
+                    # Every knot moved just like the head, so they keep doing
+                    # that and the rest of the instruction is a translation
+                    remaining = count - step - 1
+                    trail.add_line(knots_x[-1], knots_y[-1], step_x, step_y, remaining)
+                    for i in range(rope_len):
+                        knots_x[i] += step_x * remaining
+                        knots_y[i] += step_y * remaining
+                    break
 
     return len(trail)
 
 
+def part1(data):
+    """Solve part 1."""
+    return simulate_rope(data, 2)
+
+
+def part2(data, rope_len=10):
+    """Solve part 2."""
+    return simulate_rope(data, rope_len)
+
+
 def solve(puzzle_input):
     """Solve the puzzle for the given input."""
     data = parse_data(puzzle_input)
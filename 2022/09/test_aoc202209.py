@@ -35,6 +35,9 @@ def test_parse_example1(example1):
         ("R", 2),
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202209.parse_fast(puzzle_input) == aoc202209.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -49,3 +52,9 @@ def test_part2_example1(example1):
 def test_part2_example2(example2):
     """Test part 2 on example input."""
     assert aoc202209.part2(example2) == 36
+
+
+def test_part2_long_moves():
+    """Test part 2 on moves much longer than the rope."""
+    data = [("R", 100000), ("U", 100000), ("L", 3), ("D", 7)]
+    assert aoc202209.part2(data) == 199984
@@ -2,9 +2,16 @@
 
 import numpy as np
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+instruction_format = re.compile(r"noop|addx (-?[1-9][0-9]*)")
 
 
 class InputVisitor(NodeVisitor):
@@ -25,9 +32,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = (noop / addx)+
         noop = "noop" "\n"?
@@ -42,6 +49,19 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    return [
+        ("noop",) if integer is None else ("addx", int(integer))
+        for (integer,) in match_lines(instruction_format, puzzle_input)
+    ]
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def instructions_to_reg_history(instructions):
     reg = [1]
 
@@ -3,13 +3,27 @@
 # Standard library imports
 import numpy as np
 import pathlib
+import re
 import sys
 
 from dataclasses import dataclass
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
 from typing import Callable, List
 from util import profile_func
 
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+monkey_format = re.compile(
+    r"Monkey [0-9]+:\n"
+    r"  Starting items: ([0-9]+(?:, [0-9]+)*)\n"
+    r"  Operation: new = old ([*+]) ([0-9]+|old)\n"
+    r"  Test: divisible by ([0-9]+)\n"
+    r"    If true: throw to monkey ([0-9]+)\n"
+    r"    If false: throw to monkey ([0-9]+)"
+)
+
 
 @dataclass
 class Monkey:
@@ -66,9 +80,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = monkey+
         monkey = "Monkey " integer ":\n" items operation test "\n\n"?
@@ -90,6 +104,29 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with a compiled regular expression."""
+    monkeys = []
+
+    for items, operator, operand, test_div, if_true, if_false in match_lines(
+        monkey_format, puzzle_input, separator="\n\n"
+    ):
+        monkeys.append(
+            (
+                [int(item) for item in items.split(", ")],
+                (operator, None if operand == "old" else int(operand)),
+                (int(test_div), int(if_true), int(if_false)),
+            )
+        )
+
+    return monkeys
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def input_to_monkeys(data):
     monkeys = []
 
@@ -31,6 +31,9 @@ def test_parse_example1(example1):
         ([74], ("+", 3), (17, 0, 1)),
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202211.parse_fast(puzzle_input) == aoc202211.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
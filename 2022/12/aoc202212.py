@@ -4,9 +4,14 @@ import heapq
 import math
 import numpy as np
 import pathlib
+import string
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, grid_rows, parse_with_fallback
 
 
 class InputVisitor(NodeVisitor):
@@ -21,9 +26,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = grid_row+
         grid_row = grid_cell+ "\n"?
@@ -37,6 +42,16 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    """Parse input with str.split."""
+    return grid_rows(string.ascii_lowercase + "SE", puzzle_input)
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def input_to_grid(data):
     nrows = len(data)
     ncols = len(data[0])
@@ -32,6 +32,9 @@ def test_parse_example1(example1):
         ["a", "b", "d", "e", "f", "g", "h", "i"],
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202212.parse_fast(puzzle_input) == aoc202212.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -1,10 +1,18 @@
 """AoC 13, 2022."""
 
 import functools
+import json
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import FastParseError, cached_grammar, match_lines, parse_with_fallback
+
+pair_format = re.compile(r"([\[\],0-9]+)\n([\[\],0-9]+)")
 
 
 class InputVisitor(NodeVisitor):
@@ -34,9 +42,9 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    """Parse input."""
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    """Parse input with the reference grammar."""
+    input_grammar = cached_grammar(
         r"""
         input = pair+
         pair = packet "\n" packet "\n\n"?
@@ -54,6 +62,31 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_packet(text):
+    try:
+        packet = json.loads(text)
+    except json.JSONDecodeError as err:
+        raise FastParseError(f"Invalid packet {text!r}") from err
+
+    if not isinstance(packet, list):
+        raise FastParseError(f"Packet {text!r} is not a list")
+
+    return packet
+
+
+def parse_fast(puzzle_input):
+    """Parse input with str.split and json, packets are valid JSON lists."""
+    return [
+        (parse_packet(left), parse_packet(right))
+        for left, right in match_lines(pair_format, puzzle_input, separator="\n\n")
+    ]
+
+
+def parse_data(puzzle_input):
+    """Parse input."""
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def compare_packets(left, right):
     match (left, right):
         case (int(), int()):
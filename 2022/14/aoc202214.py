@@ -1,12 +1,21 @@
 """AoC 14, 2022."""
 
 import pathlib
+import re
 import sys
 
 import math
 import numpy as np
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, check_format, parse_with_fallback
+
+input_format = re.compile(
+    r"[0-9]+,[0-9]+(?: -> [0-9]+,[0-9]+)*(?:\n[0-9]+,[0-9]+(?: -> [0-9]+,[0-9]+)*)*"
+)
 
 
 class InputVisitor(NodeVisitor):
@@ -25,8 +34,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = path+
         path = coordinate+ "\n"?
@@ -41,6 +50,21 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    check_format(input_format, puzzle_input)
+    return [
+        [
+            tuple(int(x) for x in coordinate.split(","))
+            for coordinate in path.split(" -> ")
+        ]
+        for path in puzzle_input.split("\n")
+    ]
+
+
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def coorinate_bounds(data):
     min_x = math.inf
     min_y = math.inf
@@ -29,6 +29,9 @@ def test_parse_example1(example1):
         [(503, 4), (502, 4), (502, 9), (494, 9)],
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202214.parse_fast(puzzle_input) == aoc202214.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -1,11 +1,23 @@
 """AoC 15, 2022."""
 
-import math
+import concurrent.futures
+import multiprocessing
 import numpy as np
+import os
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+sensor_format = re.compile(
+    r"Sensor at x=(-?[0-9]+), y=(-?[0-9]+): "
+    r"closest beacon is at x=(-?[0-9]+), y=(-?[0-9]+)"
+)
 
 
 class InputVisitor(NodeVisitor):
@@ -28,8 +40,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = sensor+
         sensor = sensor_location ": " beacon_location "\n"?
@@ -45,18 +57,17 @@ def parse_data(puzzle_input):
     return typed_input
 
 
-def input_to_circles(data):
-    circles = []
-
-    for sensor_loc, beacon_loc in data:
-        sensor_x, sensor_y = sensor_loc
-        beacon_x, beacon_y = beacon_loc
-
-        dist = abs(sensor_x - beacon_x) + abs(sensor_y - beacon_y)
+def parse_fast(puzzle_input):
+    return [
+        ((int(sensor_x), int(sensor_y)), (int(beacon_x), int(beacon_y)))
+        for sensor_x, sensor_y, beacon_x, beacon_y in match_lines(
+            sensor_format, puzzle_input
+        )
+    ]
 
-        circles.append((sensor_loc, dist))
 
-    return circles
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
 
 
 def input_to_locations(data):
@@ -69,183 +80,308 @@ def input_to_locations(data):
     return locations
 
 
-def circle_area_bounds(circles):
-    min_x = math.inf
-    min_y = math.inf
-    max_x = -math.inf
-    max_y = -math.inf
+def sensor_arrays(data):
+    """Sensor x, y and radius arrays."""
+    sensors = np.array(
+        [
+            (sensor_x, sensor_y, abs(sensor_x - beacon_x) + abs(sensor_y - beacon_y))
+            for (sensor_x, sensor_y), (beacon_x, beacon_y) in data
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 3)
 
-    for sensor_loc, radius in circles:
-        sensor_x, sensor_y = sensor_loc
+    return (sensors[:, 0], sensors[:, 1], sensors[:, 2])
 
-        min_x = min(min_x, sensor_x - radius)
-        min_y = min(min_y, sensor_y - radius)
-        max_x = max(max_x, sensor_x + radius)
-        max_y = max(max_y, sensor_y + radius)
 
-    return ((min_x, min_y), (max_x, max_y))
+# Sensors that do not reach a row get the empty interval
+# [NO_INTERVAL, -NO_INTERVAL], which sorts last and never extends coverage
+NO_INTERVAL = np.iinfo(np.int64).max // 4
 
 
-def is_location_within_circle(circle, target_loc):
-    (circle_x, circle_y), circle_radius = circle
-    target_x, target_y = target_loc
+def row_intervals(sensors, rows):
+    """The x intervals covered by every sensor on every row.
 
-    dist = abs(circle_x - target_x) + abs(circle_y - target_y)
+    Returns inclusive (start, end) arrays of shape (rows, sensors), sorted by
+    start on every row. Sensors that do not reach a row get an empty interval
+    after all the others.
+    """
+    sensor_x, sensor_y, radius = sensors
+    half_width = radius - np.abs(sensor_y - np.asarray(rows)[:, np.newaxis])
+    starts = sensor_x - half_width
+    ends = sensor_x + half_width
 
-    return dist <= circle_radius
+    no_interval = half_width < 0
+    starts[no_interval] = NO_INTERVAL
+    ends[no_interval] = -NO_INTERVAL
 
+    order = np.argsort(starts, axis=1)
 
-def part1(data, target_y):
-    """Solve part 1."""
-    circles = input_to_circles(data)
-    known_locations = input_to_locations(data)
-    min_loc, max_loc = circle_area_bounds(circles)
+    return (
+        np.take_along_axis(starts, order, axis=1),
+        np.take_along_axis(ends, order, axis=1),
+    )
 
-    excluded_loc_count = 0
 
-    for target_x in range(min_loc[0], max_loc[0] + 1):
-        target_loc = (target_x, target_y)
+def covered_until(ends):
+    """End of the merged coverage before every interval sorted by start."""
+    covered = np.empty_like(ends)
+    covered[:, 0] = -NO_INTERVAL
+    np.maximum.accumulate(ends[:, :-1], axis=1, out=covered[:, 1:])
+    return covered
 
-        if target_loc in known_locations:
-            continue
 
-        for circle in circles:
-            if is_location_within_circle(circle, target_loc):
-                excluded_loc_count += 1
-                break
+def covered_counts(sensors, rows):
+    """Number of locations covered by sensors on every row.
 
-    return excluded_loc_count
+    Merging the sorted intervals costs O(s log s) per row for s sensors, no
+    matter how large the coordinates are.
+    """
+    starts, ends = row_intervals(sensors, rows)
+    new_starts = np.maximum(starts, covered_until(ends) + 1)
 
+    return np.maximum(ends - new_starts + 1, 0).sum(axis=1)
 
-def location_to_location_distance(p1, p2):
-    p1_x, p1_y = p1
-    p2_x, p2_y = p2
-    return abs(p1_x - p2_x) + abs(p1_y - p2_y)
 
+def first_gaps(sensors, rows, min_x, max_x):
+    """First uncovered x between min_x and max_x on every row, -1 if none."""
+    starts, ends = row_intervals(sensors, rows)
 
-def diag_line_intersection(a1, b1, a2, b2):
-    x = (b2 - b1) // (a1 - a2)
-    y = a1 * x + b1
-    return (x, y)
+    # Coverage may only end past max_x, where the appended interval starts
+    starts = np.minimum(starts, max_x + 1)
+    starts = np.concatenate((starts, np.full((len(starts), 1), max_x + 1)), axis=1)
+    ends = np.concatenate((ends, np.full((len(ends), 1), max_x + 1)), axis=1)
 
+    gap_starts = np.maximum(covered_until(ends) + 1, min_x)
+    is_gap = gap_starts < starts
+    first = np.argmax(is_gap, axis=1)
+    rows_with_gap = is_gap[np.arange(len(first)), first]
 
-def circle_corners(circle):
-    (c_x, c_y), c_r = circle
+    return np.where(rows_with_gap, gap_starts[np.arange(len(first)), first], -1)
 
-    return [
-        (c_x - c_r, c_y),
-        (c_x, c_y - c_r),
-        (c_x + c_r, c_y),
-        (c_x, c_y + c_r),
-    ]
 
+def part1(data, target_y):
+    """Solve part 1."""
+    sensors = sensor_arrays(data)
+    [excluded_loc_count] = covered_counts(sensors, [target_y])
 
-def circle_edges(circle):
-    corners = circle_corners(circle)
+    # Sensors and beacons on the row are covered, but their location is known
+    sensor_x, sensor_y, radius = sensors
+    for known_x, known_y in input_to_locations(data):
+        if known_y != target_y:
+            continue
 
-    return [
-        (1, (corners[0][1] - corners[0][0])),
-        (-1, (corners[1][1] + corners[1][0])),
-        (1, (corners[2][1] - corners[2][0])),
-        (-1, (corners[3][1] + corners[3][0])),
-    ]
+        dist = np.abs(sensor_x - known_x) + np.abs(sensor_y - known_y)
+        if np.any(dist <= radius):
+            excluded_loc_count -= 1
 
+    return int(excluded_loc_count)
 
-def circle_intersections(c1, c2):
-    c1_loc, c1_r = c1
-    c2_loc, c2_r = c2
 
-    c_to_c_dist = location_to_location_distance(c1_loc, c2_loc)
+# Distances between candidates or sensors and all sensors computed at once
+MAX_CHECK_SIZE = 1 << 20
 
-    # Circles are disjoint
-    if c_to_c_dist >= c1_r + c2_r:
-        return []
 
-    # Circles are entirely overlapping
-    if c_to_c_dist + c1_r <= c2_r or c_to_c_dist + c2_r <= c1_r:
-        return []
+def edge_lines(sensors):
+    """Lines just outside the diamond edges, in rotated coordinates.
 
-    # Circles are partially overlapping
-    c1_edges = circle_edges(c1)
-    c2_edges = circle_edges(c2)
+    In the rotated coordinates u = x + y and v = x - y every diamond is an
+    axis aligned square. Returns the u and v of the lines just outside its
+    edges, first the lower ones of all sensors and then the upper ones.
+    """
+    sensor_x, sensor_y, radius = sensors
+    u = sensor_x + sensor_y
+    v = sensor_x - sensor_y
 
-    intersections = set()
+    return (
+        np.concatenate((u - radius - 1, u + radius + 1)),
+        np.concatenate((v - radius - 1, v + radius + 1)),
+    )
 
-    for c1_edge_a, c1_edge_b in c1_edges:
-        for c2_edge_a, c2_edge_b in c2_edges:
-            if c1_edge_a == c2_edge_a:
-                continue
 
-            intersection = diag_line_intersection(
-                c1_edge_a, c1_edge_b, c2_edge_a, c2_edge_b
+def edge_candidates(sensors):
+    """Locations in the one cell wide gaps between two diamonds.
+
+    A single location that no sensor covers, away from the search bounds, is
+    walled in by diamonds that are one cell apart, |dx| + |dy| = r1 + r2 + 2.
+    Such a pair shares an edge line just outside both diamonds, and the
+    candidates are the crossings of the shared u and v lines.
+    """
+    sensor_x, sensor_y, radius = sensors
+    n_sensors = len(radius)
+    pairs = []
+
+    # Pairs of sensors in chunks of first sensors, to bound the memory
+    chunk_size = max(1, MAX_CHECK_SIZE // max(1, n_sensors))
+    for start in range(0, n_sensors, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        dist = np.abs(sensor_x[chunk, np.newaxis] - sensor_x) + np.abs(
+            sensor_y[chunk, np.newaxis] - sensor_y
+        )
+        one_apart = dist == radius[chunk, np.newaxis] + radius + 2
+        pairs.append(np.nonzero(one_apart))
+        pairs[-1][0][:] += start
+
+    first = np.concatenate([first for first, _ in pairs])
+    second = np.concatenate([second for _, second in pairs])
+
+    # The lower line of one diamond is the upper line of the other
+    u, v = edge_lines(sensors)
+    shared = []
+    for lines in (u, v):
+        lower, upper = lines[:n_sensors], lines[n_sensors:]
+        shared.append(
+            np.unique(
+                np.concatenate(
+                    (
+                        upper[first][upper[first] == lower[second]],
+                        lower[first][lower[first] == upper[second]],
+                    )
+                )
             )
+        )
 
-            c1_to_i_dist = location_to_location_distance(c1_loc, intersection)
-            c2_to_i_dist = location_to_location_distance(c2_loc, intersection)
+    u, v = (a.ravel() for a in np.meshgrid(*shared))
 
-            if c1_to_i_dist <= c1_r and c2_to_i_dist <= c2_r:
-                intersections.add(intersection)
+    # Only lines of the same parity cross on a whole location
+    same_parity = (u - v) % 2 == 0
+    u, v = u[same_parity], v[same_parity]
 
-    return intersections
+    return ((u + v) // 2, (u - v) // 2)
 
 
-def is_location_in_bounds(loc, bounds):
-    bounds_min, bounds_max = bounds
-    min_x, min_y = bounds_min
-    max_x, max_y = bounds_max
-    x, y = loc
+def bounds_candidates(sensors, search_bounds):
+    """Locations where the diamond edge lines cross the search bounds.
 
-    if x < min_x or x > max_x:
-        return False
+    A location in a corner or on the border of the search area needs only one
+    or two diamond edges to be the only uncovered location.
+    """
+    (min_x, min_y), (max_x, max_y) = search_bounds
+    u, v = edge_lines(sensors)
 
-    if y < min_y or y > max_y:
-        return False
+    xs = [np.array([min_x, max_x, min_x, max_x])]
+    ys = [np.array([min_y, min_y, max_y, max_y])]
+    for x in (min_x, max_x):
+        xs += [np.full_like(u, x), np.full_like(v, x)]
+        ys += [u - x, x - v]
+    for y in (min_y, max_y):
+        xs += [u - y, v + y]
+        ys += [np.full_like(u, y), np.full_like(v, y)]
 
-    return True
+    return (np.concatenate(xs), np.concatenate(ys))
 
 
-def nearby_locations(loc):
-    x, y = loc
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            if i == 0 and j == 0:
-                continue
+def first_uncovered(sensors, xs, ys, search_bounds):
+    """First candidate location in the bounds that no sensor covers, or None.
 
-            yield (x + i, y + j)
+    The candidates are checked in chunks, so that the distances to all
+    sensors fit in MAX_CHECK_SIZE values.
+    """
+    sensor_x, sensor_y, radius = sensors
+    (min_x, min_y), (max_x, max_y) = search_bounds
 
+    in_bounds = (xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)
+    xs, ys = xs[in_bounds], ys[in_bounds]
 
-def is_location_within_any_circle(circles, target_loc):
-    for circle in circles:
-        if is_location_within_circle(circle, target_loc):
-            return True
+    chunk_size = max(1, MAX_CHECK_SIZE // max(1, len(radius)))
+    for start in range(0, len(xs), chunk_size):
+        chunk_x = xs[start : start + chunk_size, np.newaxis]
+        chunk_y = ys[start : start + chunk_size, np.newaxis]
+        dist = np.abs(chunk_x - sensor_x) + np.abs(chunk_y - sensor_y)
+        [uncovered] = np.nonzero(np.all(dist > radius, axis=1))
+        if len(uncovered) > 0:
+            return (int(chunk_x[uncovered[0], 0]), int(chunk_y[uncovered[0], 0]))
 
-    return False
+    return None
 
 
 def part2(data, search_bounds):
     """Solve part 2."""
-    circles = input_to_circles(data)
+    sensors = sensor_arrays(data)
+    (_, min_y), (_, max_y) = search_bounds
 
-    intersections = set()
-    num_circles = len(circles)
+    distress_beacon_loc = first_uncovered(
+        sensors, *edge_candidates(sensors), search_bounds
+    )
+    if distress_beacon_loc is None:
+        distress_beacon_loc = first_uncovered(
+            sensors, *bounds_candidates(sensors, search_bounds), search_bounds
+        )
+    if distress_beacon_loc is None:
+        # Not walled in by diamond edges after all, scan every row
+        distress_beacon_loc = scan_rows(sensors, search_bounds, min_y, max_y + 1)
+    if distress_beacon_loc is None:
+        return None
 
-    for i in range(num_circles - 1):
-        for j in range(i + 1, num_circles):
-            intersections.update(circle_intersections(circles[i], circles[j]))
+    distress_beacon_x, distress_beacon_y = distress_beacon_loc
 
-    distress_beacon_loc = None
+    return distress_beacon_x * 4000000 + distress_beacon_y
 
-    for intersection_loc in intersections:
-        for candidate_loc in nearby_locations(intersection_loc):
-            if not is_location_in_bounds(candidate_loc, search_bounds):
-                continue
 
-            if not is_location_within_any_circle(circles, candidate_loc):
-                distress_beacon_loc = candidate_loc
-                break
+# Rows scanned at once by one worker, between checks for a stop request
+ROW_BATCH_SIZE = 4096
+ROW_CHUNK_SIZE = 1 << 16
+
+_stop_scan = None
+
+
+def init_row_scan(stop_scan):
+    global _stop_scan
+    _stop_scan = stop_scan
 
-        if distress_beacon_loc:
-            break
+
+def scan_rows(sensors, search_bounds, y_start, y_end):
+    """First uncovered location on rows y_start until y_end, or None."""
+    (min_x, _), (max_x, _) = search_bounds
+
+    for batch_start in range(y_start, y_end, ROW_BATCH_SIZE):
+        if _stop_scan is not None and _stop_scan.is_set():
+            return None
+
+        rows = np.arange(batch_start, min(batch_start + ROW_BATCH_SIZE, y_end))
+        gaps = first_gaps(sensors, rows, min_x, max_x)
+        [found] = np.nonzero(gaps >= 0)
+        if len(found) > 0:
+            if _stop_scan is not None:
+                _stop_scan.set()
+            return (int(gaps[found[0]]), int(rows[found[0]]))
+
+    return None
+
+
+def part2_row_scan(data, search_bounds, workers=None, chunk_size=ROW_CHUNK_SIZE):
+    """Solve part 2 by scanning the rows of the search area on a process pool.
+
+    The rows are split in chunks, each scanned with the merged intervals of
+    the sensors. When a worker finds the uncovered location, the chunks that
+    have not started are cancelled and the running ones stop at their next
+    batch of rows.
+    """
+    sensors = sensor_arrays(data)
+    (_, min_y), (_, max_y) = search_bounds
+    chunks = [
+        (y_start, min(y_start + chunk_size, max_y + 1))
+        for y_start in range(min_y, max_y + 1, chunk_size)
+    ]
+
+    stop_scan = multiprocessing.Event()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=init_row_scan,
+        initargs=(stop_scan,),
+    ) as executor:
+        futures = [
+            executor.submit(scan_rows, sensors, search_bounds, y_start, y_end)
+            for y_start, y_end in chunks
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            distress_beacon_loc = future.result()
+            if distress_beacon_loc is not None:
+                for other in futures:
+                    other.cancel()
+                break
+        else:
+            return None
 
     distress_beacon_x, distress_beacon_y = distress_beacon_loc
 
@@ -41,17 +41,56 @@ def test_parse_example1(example1):
         ((20, 1), (15, 3)),
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202215.parse_fast(puzzle_input) == aoc202215.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
     assert aoc202215.part1(example1, 10) == 26
 
 
+def test_covered_counts_example1(example1):
+    """Test the batched row coverage against checking every location."""
+    rows = list(range(-10, 31))
+    expected = [
+        sum(
+            any(
+                abs(sx - x) + abs(sy - y) <= abs(sx - bx) + abs(sy - by)
+                for (sx, sy), (bx, by) in example1
+            )
+            for x in range(-20, 45)
+        )
+        for y in rows
+    ]
+
+    counts = aoc202215.covered_counts(aoc202215.sensor_arrays(example1), rows)
+    assert counts.tolist() == expected
+
+
 def test_part2_example1(example1):
     """Test part 2 on example input."""
     assert aoc202215.part2(example1, ((0, 0), (20, 20))) == 56000011
 
 
+def test_part2_row_scan_example1(example1):
+    """Test the parallel row scan on example input."""
+    search_bounds = ((0, 0), (20, 20))
+    assert aoc202215.part2_row_scan(example1, search_bounds, 2, 4) == 56000011
+
+
+def test_part2_row_scan_fallback():
+    """Test a beacon not walled in by edges, found by scanning the rows."""
+    data = [
+        ((-4, -4), (19, -5)),
+        ((7, 24), (3, 14)),
+        ((22, 7), (17, 18)),
+        ((21, 3), (12, 2)),
+        ((22, 19), (17, 2)),
+    ]
+    assert aoc202215.part2(data, ((0, 0), (20, 20))) == 8 * 4000000 + 10
+
+
 @pytest.mark.skip(reason="Not implemented")
 def test_part2_example2(example2):
     """Test part 2 on example input."""
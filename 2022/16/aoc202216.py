@@ -1,11 +1,21 @@
 """AoC 16, 2022."""
 
-from collections import deque
 import math
+import numpy as np
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+valve_format = re.compile(
+    r"Valve ([A-Z]+) has flow rate=([0-9]+); "
+    r"tunnels? leads? to valves? ([A-Z]+(?:, [A-Z]+)*)"
+)
 
 
 class InputVisitor(NodeVisitor):
@@ -35,8 +45,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = valve_and_tunnels+
         valve_and_tunnels = valve "; " tunnels "\n"?
@@ -54,65 +64,99 @@ def parse_data(puzzle_input):
     return typed_input
 
 
-def distances(graph, source, targets):
-    # https://en.wikipedia.org/wiki/Breadth-first_search
-    dists = {source: 0}
-    explored = {source}
-    queue = deque([(0, source)])
+def parse_fast(puzzle_input):
+    return [
+        (valve_id, int(flow_rate), tunnel_ids.split(", "))
+        for valve_id, flow_rate, tunnel_ids in match_lines(valve_format, puzzle_input)
+    ]
 
-    while len(queue) > 0:
-        dist, u = queue.popleft()
 
-        if all(target in dists for target in targets):
-            break
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
 
-        for v in graph[u]:
-            if not v in explored:
-                explored.add(v)
-                dists[v] = dist + 1
-                queue.append((dist + 1, v))
 
-    return {k: v for k, v in dists.items() if k in targets}
+# Distance between valves without a path between them, opening a valve that
+# far away never fits in the time
+UNREACHABLE = np.iinfo(np.int64).max // 4
+# Graphs up to this many valves use Floyd-Warshall, larger ones a BFS
+MAX_FLOYD_WARSHALL_VALVES = 64
 
 
-def find_paths(
-    graph,
-    rates,
-    source,
-    n,
-    visited,
-    acc_pressure,
-    acc_path,
-    results,
-):
-    results.append((acc_pressure, acc_path))
+def tunnel_arrays(graph, ids):
+    """The tunnels as arrays of source and destination valve indices."""
+    index = {id: i for i, id in enumerate(ids)}
+    tunnels = [
+        (index[id], index[other]) for id, edges in graph.items() for other in edges
+    ]
+    tunnels = np.array(tunnels, dtype=np.int64).reshape(-1, 2)
+    return tunnels[:, 0], tunnels[:, 1]
 
-    if all(dest in visited for dest in graph):
-        return results
 
-    for dest, dist in graph[source].items():
-        if dest in visited:
-            continue
+def floyd_warshall(n_valves, sources, destinations):
+    """Shortest distances between all valves, O(n^3) for small graphs."""
+    # https://en.wikipedia.org/wiki/Floyd%E2%80%93Warshall_algorithm
+    dists = np.full((n_valves, n_valves), UNREACHABLE, dtype=np.int64)
+    dists[sources, destinations] = 1
+    np.fill_diagonal(dists, 0)
 
-        if dist + 1 > n:
-            continue
+    for k in range(n_valves):
+        np.minimum(dists, dists[:, k, np.newaxis] + dists[np.newaxis, k, :], out=dists)
+
+    return dists
 
-        visited.add(dest)
-
-        find_paths(
-            graph,
-            rates,
-            dest,
-            n - dist - 1,
-            visited,
-            acc_pressure + rates[dest] * (n - dist - 1),
-            acc_path + [dest],
-            results,
+
+def bfs_distances(n_valves, sources, destinations, starts):
+    """Shortest distances from the start valves, one batched BFS.
+
+    The frontier holds (search, valve) pairs of all searches, and advances a
+    level at a time through the tunnels as index arrays grouped by source
+    valve. Every search stops at the valves it has already reached, and all
+    of them stop once every start valve has reached the other start valves.
+    """
+    # https://en.wikipedia.org/wiki/Breadth-first_search
+    order = np.argsort(sources, kind="stable")
+    neighbors = destinations[order]
+    degrees = np.bincount(sources, minlength=n_valves)
+    first_neighbor = np.cumsum(degrees) - degrees
+
+    n_starts = len(starts)
+    dists = np.full((n_starts, n_valves), UNREACHABLE, dtype=np.int64)
+    searches = np.arange(n_starts)
+    valves = starts
+    dists[searches, valves] = 0
+    level = 0
+
+    while len(valves) > 0 and not np.all(dists[:, starts] < UNREACHABLE):
+        level += 1
+
+        # Every tunnel out of every frontier valve
+        counts = degrees[valves]
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
         )
+        searches = np.repeat(searches, counts)
+        valves = neighbors[np.repeat(first_neighbor[valves], counts) + offsets]
+
+        new = dists[searches, valves] == UNREACHABLE
+        pairs = np.unique(searches[new] * n_valves + valves[new])
+        searches, valves = np.divmod(pairs, n_valves)
+        dists[searches, valves] = level
+
+    return dists
+
+
+def distances(graph, ids, starts):
+    """Shortest distances from the start valves to all valves.
 
-        visited.remove(dest)
+    ids orders the valves, and starts are indices into it. Valves without a
+    path from a start are UNREACHABLE.
+    """
+    sources, destinations = tunnel_arrays(graph, ids)
 
-    return results
+    if len(ids) <= MAX_FLOYD_WARSHALL_VALVES:
+        return floyd_warshall(len(ids), sources, destinations)[starts]
+
+    return bfs_distances(len(ids), sources, destinations, np.asarray(starts))
 
 
 def input_to_graph(data):
@@ -122,69 +166,289 @@ def input_to_graph(data):
 
 
 def simplify_graph(graph, rates):
-    points_of_interest = {id for id, rate in rates.items() if rate > 0}
-    points_of_interest.add("AA")
+    """Valves worth opening, their flow rates and the distances between them.
+
+    Index 0 is the start valve AA, followed by every valve with flow that can
+    be reached from it. The distances are a NumPy matrix between those
+    valves.
+    """
+    valves = ["AA"] + sorted(
+        id for id, rate in rates.items() if rate > 0 and id != "AA"
+    )
 
-    dists = {}
+    ids = list(graph)
+    index = {id: i for i, id in enumerate(ids)}
+    starts = [index[id] for id in valves]
+    dists = distances(graph, ids, starts)[:, starts]
 
-    for poi in points_of_interest:
-        dists[poi] = distances(graph, poi, points_of_interest)
+    # Valves without a path from AA can never be opened
+    reachable = dists[0] < UNREACHABLE
+    valves = [id for id, keep in zip(valves, reachable) if keep]
+    dists = dists[np.ix_(reachable, reachable)]
 
-    return dists
+    return valves, np.array([rates[id] for id in valves], dtype=np.int64), dists
 
 
-def part1(data):
-    """Solve part 1."""
-    graph, rates = input_to_graph(data)
-    dists = simplify_graph(graph, rates)
-    paths = find_paths(dists, rates, "AA", 30, {"AA"}, 0, [], [])
+def mask_flows(valve_rates):
+    """Total flow rate of every set of opened valves, as a bitmask of rates."""
+    flows = np.zeros(1, dtype=np.int64)
+    for rate in valve_rates:
+        flows = np.concatenate((flows, flows + rate))
+    return flows
 
-    return sorted(paths, reverse=True)[0][0]
 
+def best_pressures(data, time_budgets):
+    """Best pressure released by opening every set of valves.
 
-def part2(data):
-    """Solve part 2."""
+    Returns one array per time budget, indexed by the bitmask of opened
+    valves, bit i for the valve with the i-th flow rate. All budgets share
+    one pass over the states: a path of elapsed time t that opened valves of
+    total flow f at minutes o_1, o_2, ... releases T * f - sum(rate * o) in T
+    minutes, for every budget T >= t.
+    """
     graph, rates = input_to_graph(data)
-    dists = simplify_graph(graph, rates)
+    _, valve_rates, dists = simplify_graph(graph, rates)
+    valve_rates = valve_rates[1:].tolist()
+    n_valves = len(valve_rates)
+    flows = mask_flows(valve_rates)
+    max_time = max(time_budgets)
+
+    # Opening valve j from valve i takes the walk and one minute to open it
+    open_costs = (dists[:, 1:] + 1).tolist()
+
+    # states[t] maps (position, opened valves) after t minutes to the best
+    # -sum(rate * opening minute) over paths reaching that state
+    states = [{} for _ in range(max_time + 1)]
+    states[0][0, 0] = 0
+    best_lists = [[0] * (1 << n_valves) for _ in time_budgets]
+
+    for t in range(max_time + 1):
+        for (pos, opened), score in states[t].items():
+            flow = int(flows[opened])
+            for budget, budget_best in zip(time_budgets, best_lists):
+                if t <= budget:
+                    pressure = budget * flow + score
+                    if pressure > budget_best[opened]:
+                        budget_best[opened] = pressure
+
+            for j, cost in enumerate(open_costs[pos]):
+                bit = 1 << j
+                next_t = t + cost
+                if opened & bit or next_t >= max_time:
+                    continue
+
+                key = (j + 1, opened | bit)
+                next_score = score - valve_rates[j] * next_t
+                next_states = states[next_t]
+                if next_score > next_states.get(key, -math.inf):
+                    next_states[key] = next_score
+
+        states[t] = None
+
+    return [np.array(b, dtype=np.int64) for b in best_lists]
+
+
+def subset_max(best):
+    """Best pressure of every set of valves when opening only some of them.
+
+    Sweeps the valves one bit at a time, so every mask takes the maximum over
+    all its subsets in O(n * 2^n).
+    """
+    best = best.copy()
+    n_masks = len(best)
+    bit = 1
+    while bit < n_masks:
+        # Pairs of masks without and with the bit are the halves of blocks
+        blocks = best.reshape(-1, 2, bit)
+        np.maximum(blocks[:, 1], blocks[:, 0], out=blocks[:, 1])
+        bit <<= 1
+    return best
+
+
+def useful_masks(best):
+    """Masks whose best pressure beats the best of every proper subset.
+
+    Opening more valves for no more pressure only takes valves away from the
+    other agents, so only these masks need to be combined.
+    """
+    best_of_subsets = subset_max(best)
+    best_of_proper = np.full_like(best, -1)
+    bit = 1
+    while bit < len(best):
+        blocks = best_of_proper.reshape(-1, 2, bit)
+        subsets = best_of_subsets.reshape(-1, 2, bit)
+        np.maximum(blocks[:, 1], subsets[:, 0], out=blocks[:, 1])
+        bit <<= 1
+
+    return np.nonzero(best > best_of_proper)[0]
+
+
+def gain_bounds(best):
+    """Upper bound of the pressure of any number of agents on every mask.
+
+    Opening a valve adds at most its largest gain over any mask without it,
+    so the sum of those gains bounds the pressure of disjoint masks.
+    """
+    gains = []
+    bit = 1
+    while bit < len(best):
+        blocks = best.reshape(-1, 2, bit)
+        gains.append(int((blocks[:, 1] - blocks[:, 0]).max()))
+        bit <<= 1
+
+    return mask_flows(gains)
+
+
+MAX_COMBINE_COST = 1 << 27
+
+MAX_COMBINE_BATCH = 1 << 22
+
+
+def combine_cost(best, masks):
+    """Number of updates of one combine_agents call on the useful masks."""
+    n_valves = len(best).bit_length() - 1
+    n_free = n_valves - mask_flows([1] * n_valves)[masks]
+    return int(np.sum(np.left_shift(1, n_free.astype(np.int64))))
+
+
+def combine_agents(best, masks, team_best):
+    """Best pressure of one more agent on every mask.
+
+    For every useful mask r of the new agent, every superset m of r takes
+    best[r] + team_best[m ^ r]. The supersets are built by depositing the bits
+    of all counters onto the free valves of r, in batches of masks with the
+    same number of free valves. team_best has to be subset maxed, and so is
+    the result.
+    """
+    n_valves = len(best).bit_length() - 1
+    combined = team_best.copy()
+    masks = masks[masks != 0]
+    bits = (masks[:, None] >> np.arange(n_valves)) & 1
+    n_free = n_valves - bits.sum(axis=1)
+
+    for k in np.unique(n_free):
+        group = n_free == k
+        group_masks = masks[group]
+        free_bits = np.nonzero(1 - bits[group])[1].reshape(len(group_masks), k)
+        counters = (np.arange(1 << k)[:, None] >> np.arange(k)) & 1
+        batch = max(1, MAX_COMBINE_BATCH >> k)
+        for start in range(0, len(group_masks), batch):
+            batch_masks = group_masks[start : start + batch]
+            rests = (counters << free_bits[start : start + batch, None, :]).sum(axis=2)
+            totals = best[batch_masks, None] + team_best[rests]
+            np.maximum.at(
+                combined, (rests | batch_masks[:, None]).ravel(), totals.ravel()
+            )
+
+    return combined
+
+
+def team_pressure(team, available, n_agents, cap, lower_bound):
+    """Best pressure of agents opening disjoint subsets of the available valves.
+
+    A branch and bound over the useful masks, sorted by pressure descending.
+    The agents are interchangeable, so they take their masks in descending
+    order of pressure: every agent releases at most cap, the pressure of the
+    agent before it, and at least one agent has to release more than
+    lower_bound / n_agents to beat the lower bound. Returns lower_bound if no
+    better split is found.
+    """
+    best_of_subsets, gains, masks, pressures, neg_pressures = team
+
+    if n_agents == 1:
+        return max(lower_bound, int(best_of_subsets[available]))
+
+    # The masks with lower_bound / n_agents < pressure <= cap
+    start = np.searchsorted(neg_pressures, -cap, side="left")
+    stop = np.searchsorted(neg_pressures, -(lower_bound // n_agents), side="left")
+    if start >= stop:
+        return lower_bound
+
+    if n_agents == 2:
+        # The last agent may open any subset of the valves left over
+        candidates = masks[start:stop]
+        fits = (candidates & ~available) == 0
+        if not np.any(fits):
+            return lower_bound
+        rest = available ^ candidates[fits]
+        totals = pressures[start:stop][fits] + best_of_subsets[rest]
+        return max(lower_bound, int(totals.max()))
+
+    for mask, pressure in zip(
+        masks[start:stop].tolist(), pressures[start:stop].tolist()
+    ):
+        if pressure * n_agents <= lower_bound:
+            break
 
-    paths = find_paths(dists, rates, "AA", 26, {"AA"}, 0, [], [])
-    sorted_paths = sorted(paths, reverse=True)
+        if mask & ~available:
+            continue
 
-    paths_of_length = [[] for _ in range(len(dists))]
+        rest = available ^ mask
+        others = min(
+            (n_agents - 1) * min(pressure, int(best_of_subsets[rest])),
+            int(gains[rest]),
+        )
+        if pressure + others <= lower_bound:
+            continue
 
-    for p in sorted_paths:
-        path_len = len(p[1])
-        paths_of_length[path_len].append(p)
+        lower_bound = pressure + team_pressure(
+            team, rest, n_agents - 1, pressure, lower_bound - pressure
+        )
 
-    for i, paths in enumerate(paths_of_length):
-        print(i, len(paths))
+    return lower_bound
 
-    max_pressure = 0
-    lower_bound_cost = part1(data)
 
-    for n in range(len(dists) // 2, 0, -1):
-        len1 = n
+def max_team_pressure(best, n_agents=2):
+    """Best pressure of agents opening disjoint sets of valves.
 
-        for len2 in range(len(dists) - len1 - 1, 0, -1):
-            for c1, p1 in paths_of_length[len1]:
-                for c2, p2 in paths_of_length[len2]:
-                    if c1 + c2 < lower_bound_cost:
-                        continue
+    Any number of agents is supported for up to about 17 valves with flow,
+    where each combine_agents call takes about ten seconds. Four or more
+    agents combine the team of half of them with the complement of the team
+    of the other half. Above MAX_COMBINE_COST the branch and bound of
+    team_pressure is used instead, which stays fast for up to 3 agents on
+    about 20 valves with flow but gets intractable with more.
+    """
+    masks = useful_masks(best)
+    if n_agents >= 4 and combine_cost(best, masks) <= MAX_COMBINE_COST:
+        teams = [subset_max(best)]
+        for _ in range(n_agents - n_agents // 2 - 1):
+            teams.append(combine_agents(best, masks, teams[-1]))
+        halves = teams[n_agents // 2 - 1] + teams[-1][::-1]
+        return int(halves.max())
 
-                    if any(p in p2 for p in p1):
-                        continue
+    masks = masks[np.argsort(-best[masks], kind="stable")]
+    team = (subset_max(best), gain_bounds(best), masks, best[masks], -best[masks])
+    full = len(best) - 1
 
-                    max_pressure = max(max_pressure, c1 + c2)
-                    lower_bound_cost = max_pressure
+    # Fewer agents can always do as well, which gives a lower bound
+    max_pressure = int(best.max())
+    for n in range(2, n_agents + 1):
+        max_pressure = team_pressure(team, full, n, int(best.max()), max_pressure)
 
     return max_pressure
 
 
+def part1(data):
+    """Solve part 1."""
+    [best] = best_pressures(data, [30])
+
+    return int(best.max())
+
+
+def part2(data, n_agents=2):
+    """Solve part 2."""
+    [best] = best_pressures(data, [26])
+
+    # The elephant opens a disjoint set of valves
+    return max_team_pressure(best, n_agents)
+
+
 def solve(puzzle_input):
     """Solve the puzzle for the given input."""
     data = parse_data(puzzle_input)
-    yield part1(data)
-    yield part2(data)
+    best30, best26 = best_pressures(data, [30, 26])
+    yield int(best30.max())
+    yield max_team_pressure(best26)
 
 
 if __name__ == "__main__":
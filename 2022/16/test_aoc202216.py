@@ -37,6 +37,9 @@ def test_parse_example1(example1):
         ("JJ", 21, ["II"]),
     ]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202216.parse_fast(puzzle_input) == aoc202216.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -48,6 +51,45 @@ def test_part2_example1(example1):
     assert aoc202216.part2(example1) == 1707
 
 
+def test_part2_n_agents_example1(example1):
+    """Test part 2 with other numbers of agents on example input."""
+    assert aoc202216.part2(example1, n_agents=1) == 1327
+    assert aoc202216.part2(example1, n_agents=3) == 1794
+    assert aoc202216.part2(example1, n_agents=4) == 1825
+
+
+def test_part2_n_agents_ring(monkeypatch):
+    """Test four agents on a ring of 54 valves, 17 of them with flow."""
+    names = ["AA"] + [f"{chr(66 + i // 26)}{chr(65 + i % 26)}" for i in range(53)]
+    data = [
+        (
+            name,
+            (i * 7) % 23 + 1 if i and i % 3 == 0 else 0,
+            [names[i - 1], names[(i + 1) % len(names)]],
+        )
+        for i, name in enumerate(names)
+    ]
+    [best] = aoc202216.best_pressures(data, [26])
+    assert len(best) == 1 << 17
+
+    assert aoc202216.max_team_pressure(best, n_agents=4) == 2855
+
+    # The same with the branch and bound
+    monkeypatch.setattr(aoc202216, "MAX_COMBINE_COST", 0)
+    assert aoc202216.max_team_pressure(best, n_agents=4) == 2855
+
+
+def test_part1_unreachable_valve(example1):
+    """Test that a valve without a path from AA is never opened."""
+    data = example1 + [("YY", 0, ["ZZ"]), ("ZZ", 50, ["YY"])]
+
+    graph, rates = aoc202216.input_to_graph(data)
+    valves, _, _ = aoc202216.simplify_graph(graph, rates)
+    assert "ZZ" not in valves
+
+    assert aoc202216.part1(data) == 1651
+
+
 @pytest.mark.skip(reason="Not implemented")
 def test_part2_example2(example2):
     """Test part 2 on example input."""
@@ -1,156 +1,200 @@
 """AoC 17, 2022."""
 
-import numpy as np
+import functools
 import pathlib
 import sys
 
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from cycles import find_cycle
+
 
 def parse_data(puzzle_input):
     return puzzle_input
 
 
-def rock_shapes():
-    return [
-        np.array([[1, 1, 1, 1]], dtype=np.int8),
-        np.array(
-            [
-                [0, 1, 0],
-                [1, 1, 1],
-                [0, 1, 0],
-            ],
-            dtype=np.int8,
-        ),
-        np.array(
-            [
-                [0, 0, 1],
-                [0, 0, 1],
-                [1, 1, 1],
-            ],
-            dtype=np.int8,
-        ),
-        np.array(
-            [
-                [1],
-                [1],
-                [1],
-                [1],
-            ],
-            dtype=np.int8,
-        ),
-        np.array(
-            [
-                [1, 1],
-                [1, 1],
-            ],
-            dtype=np.int8,
-        ),
-    ]
-
-
-def height_to_y(cave, height):
-    return cave.shape[0] - height
-
-
-def y_to_height(cave, y):
-    return cave.shape[0] - y
-
-
-def can_move_to(cave, rock, loc):
-    cave_h, cave_w = cave.shape
-    rock_h, rock_w = rock.shape
-    x, y = loc
-
-    if x < 0 or y < 0 or x + rock_w > cave_w or y + rock_h > cave_h:
-        return False
+# Rocks as row masks from the bottom up, in a row bit 6 is the leftmost
+# column, and each rock starts two units away from the left wall
+ROCKS = [
+    (0b0011110,),
+    (0b0001000, 0b0011100, 0b0001000),
+    (0b0011100, 0b0000100, 0b0000100),
+    (0b0010000, 0b0010000, 0b0010000, 0b0010000),
+    (0b0011000, 0b0011000),
+]
+
+LEFT_WALL = 0b1000000
+RIGHT_WALL = 0b0000001
+FULL_ROW = 0b1111111
+
+# Number of rows kept below the top of the tower
+WINDOW_ROWS = 128
+
+# Number of rock placements kept by place_rock
+PLACEMENT_CACHE_SIZE = 1 << 16
+
+
+class Tower:
+    """Bitboard of the settled rocks where every row is a 7-bit int.
+
+    Only a window of the topmost rows is kept, so memory use does not grow
+    with the number of rocks.
+    """
+
+    def __init__(self, jets, rows=(), rock_index=0, jet_index=0):
+        self.jets = jets
+        self.jet_index = jet_index
+        self.rock_index = rock_index
+        self.height = len(rows)
+        # Height of the lowest row kept in rows
+        self.base = 0
+        self.rows = list(rows)
+
+    def collides(self, rock, y):
+        if y < self.base:
+            if self.base == 0:
+                # The floor
+                return True
+            raise RuntimeError(f"Rock fell below the {WINDOW_ROWS} row window")
+
+        rows = self.rows
+        offset = y - self.base
+        for dy, mask in enumerate(rock):
+            i = offset + dy
+            if i < len(rows) and rows[i] & mask:
+                return True
 
-    if np.any((cave[y : y + rock_h, x : x + rock_w] + rock) > 1):
         return False
 
-    return True
-
-
-def move_rock(cave, rock, jet, rock_loc):
-    rock_x, rock_y = rock_loc
-
-    match jet:
-        case ">":
-            if can_move_to(cave, rock, (rock_x + 1, rock_y)):
-                rock_x += 1
-        case "<":
-            if can_move_to(cave, rock, (rock_x - 1, rock_y)):
-                rock_x -= 1
-
-    stop = False
-
-    if can_move_to(cave, rock, (rock_x, rock_y + 1)):
-        rock_y += 1
-    else:
-        stop = True
-
-    return (stop, (rock_x, rock_y))
+    def drop_rock(self):
+        """Drop the next rock, return the height of the tower after it."""
+        rock = ROCKS[self.rock_index]
+        self.rock_index = (self.rock_index + 1) % len(ROCKS)
+        y = self.height + 3
+
+        while True:
+            jet = self.jets[self.jet_index]
+            self.jet_index = (self.jet_index + 1) % len(self.jets)
+
+            if jet == ">":
+                if not any(mask & RIGHT_WALL for mask in rock):
+                    moved = tuple(mask >> 1 for mask in rock)
+                    if not self.collides(moved, y):
+                        rock = moved
+            elif not any(mask & LEFT_WALL for mask in rock):
+                moved = tuple(mask << 1 for mask in rock)
+                if not self.collides(moved, y):
+                    rock = moved
+
+            if self.collides(rock, y - 1):
+                break
+            y -= 1
+
+        self.settle(rock, y)
+
+        return self.height
+
+    def settle(self, rock, y):
+        rows = self.rows
+        offset = y - self.base
+        for dy, mask in enumerate(rock):
+            i = offset + dy
+            if i == len(rows):
+                rows.append(0)
+            rows[i] |= mask
+
+        self.height = max(self.height, y + len(rock))
+
+        # Drop the rows below the window once in a while
+        if len(rows) > 2 * WINDOW_ROWS:
+            n_dropped = len(rows) - WINDOW_ROWS
+            del rows[:n_dropped]
+            self.base += n_dropped
+
+    def surface(self):
+        """The free cells that falling rocks can still reach, top row first.
+
+        Rocks only move sideways and down, so they can only ever test the
+        cells of this flood fill from above the tower, which makes it a
+        complete description of the tower for the rocks to come.
+        """
+        surface = []
+        reachable = FULL_ROW
+
+        for i in range(self.height - self.base - 1, -1, -1):
+            free = ~self.rows[i] & FULL_ROW
+            reachable &= free
+
+            # Spread sideways within the row until nothing changes
+            while True:
+                spread = (reachable | reachable << 1 | reachable >> 1) & free
+                if spread == reachable:
+                    break
+                reachable = spread
+
+            if not reachable:
+                break
+            surface.append(reachable)
 
+        return tuple(surface)
 
-def simulate_cave(data, simulate_n_rocks):
-    rocks = rock_shapes()
 
-    cave = np.zeros((simulate_n_rocks * 4, 7), dtype=np.int8)
-    height_changes = [0]
+@functools.lru_cache(maxsize=PLACEMENT_CACHE_SIZE)
+def place_rock(jets, surface, rock_index, jet_index):
+    """Drop a rock on a tower surface.
 
-    simulation_step = 0
+    The surface decides everything about how the rock falls, so the result
+    is cached: the growth of the tower, the next jet index and the new
+    surface.
+    """
+    # Everything below the surface is out of reach, so it might as well be
+    # the floor
+    rows = [~mask & FULL_ROW for mask in reversed(surface)]
+    tower = Tower(jets, rows, rock_index, jet_index)
+    tower.drop_rock()
 
-    for rock_nr in range(simulate_n_rocks):
-        rock = rocks[rock_nr % len(rocks)]
-        tower_height = sum(height_changes)
-        rock_x, rock_y = (2, height_to_y(cave, tower_height + 3 + rock.shape[0]))
-        stop = False
+    return (tower.height - len(rows), tower.jet_index, tower.surface())
 
-        while not stop:
-            jet = data[simulation_step % len(data)]
-            stop, (rock_x, rock_y) = move_rock(cave, rock, jet, (rock_x, rock_y))
 
-            simulation_step += 1
+class SurfaceTower:
+    """Tower that only keeps its surface and drops rocks with place_rock."""
 
-        cave[rock_y : rock_y + rock.shape[0], rock_x : rock_x + rock.shape[1]] += rock
+    def __init__(self, jets):
+        self.jets = jets
+        self.rock_index = 0
+        self.jet_index = 0
+        self.height = 0
+        self.surface = ()
 
-        height_changes.append(
-            max(tower_height, y_to_height(cave, rock_y)) - tower_height
+    def drop_rock(self):
+        growth, self.jet_index, self.surface = place_rock(
+            self.jets, self.surface, self.rock_index, self.jet_index
         )
+        self.rock_index = (self.rock_index + 1) % len(ROCKS)
+        self.height += growth
+
+        return self.height
 
-    return height_changes[1:]
+    def state(self):
+        return (self.rock_index, self.jet_index, self.surface)
 
 
 def part1(data, simulate_n_rocks=2022):
     """Solve part 1."""
-    height_changes = simulate_cave(data, simulate_n_rocks)
-    return sum(height_changes)
+    tower = SurfaceTower(data)
 
+    for _ in range(simulate_n_rocks):
+        tower.drop_rock()
 
-def part2(data, simulate_n_rocks=1000000000000):
-    """Solve part 2."""
-    search_len = len(data)
-    height_changes = simulate_cave(data, search_len * 4)
-
-    pattern_idxs = []
-
-    for i in range(len(height_changes) - search_len):
-        if height_changes[i : i + search_len] == height_changes[-search_len:]:
-            pattern_idxs.append(i)
-
-            if len(pattern_idxs) > 1:
-                break
-
-    pattern_period = pattern_idxs[1] - pattern_idxs[0]
-    pattern_height = sum(height_changes[pattern_idxs[0] : pattern_idxs[1]])
-
-    pattern_mult = (simulate_n_rocks - pattern_idxs[0]) // pattern_period
-    pattern_mod = (simulate_n_rocks - pattern_idxs[0]) % pattern_period
+    return tower.height
 
-    th_start = sum(height_changes[: pattern_idxs[0]])
-    th_end = sum(height_changes[pattern_idxs[0] : pattern_idxs[0] + pattern_mod])
 
-    tower_height = th_start + pattern_mult * pattern_height + th_end
+def part2(data, simulate_n_rocks=1000000000000):
+    """Solve part 2."""
+    tower = SurfaceTower(data)
+    cycle = find_cycle(tower.drop_rock, tower.state, lambda: tower.height)
 
-    return tower_height
+    return cycle.value_after(simulate_n_rocks)
 
 
 def solve(puzzle_input):
@@ -37,6 +37,31 @@ def test_part2_example1(example1):
     assert aoc202217.part2(example1) == 1514285714288
 
 
+def test_surface_tower_example1(example1):
+    """Test that keeping only the surface gives the heights of the full tower."""
+    tower = aoc202217.Tower(example1)
+    surface_tower = aoc202217.SurfaceTower(example1)
+
+    for _ in range(1000):
+        assert surface_tower.drop_rock() == tower.drop_rock()
+        assert surface_tower.jet_index == tower.jet_index
+        assert surface_tower.surface == tower.surface()
+
+
+def test_tower_window_overflow():
+    """Test that a rock falling below the kept rows is an error."""
+    # A shaft in the leftmost column, deeper than the window
+    n_rows = 2 * aoc202217.WINDOW_ROWS + 10
+    tower = aoc202217.Tower("<", rows=[0b0111111] * n_rows)
+    tower.settle((0b0111111,), tower.height)
+    assert tower.base > 0
+
+    # The vertical rock is pushed into the shaft
+    tower.rock_index = 3
+    with pytest.raises(RuntimeError):
+        tower.drop_rock()
+
+
 @pytest.mark.skip(reason="Not implemented")
 def test_part2_example2(example2):
     """Test part 2 on example input."""
@@ -3,9 +3,16 @@
 import numpy as np
 import math
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, check_format, parse_with_fallback
+
+input_format = re.compile(r"[0-9]+,[0-9]+,[0-9]+(?:\n[0-9]+,[0-9]+,[0-9]+)*")
 
 
 class InputVisitor(NodeVisitor):
@@ -20,8 +27,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = cube+
         cube = integer "," integer "," integer "\n"?
@@ -35,6 +42,15 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    check_format(input_format, puzzle_input)
+    return [tuple(int(x) for x in cube.split(",")) for cube in puzzle_input.split("\n")]
+
+
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def grid_bounds(data):
     min_x = min_y = min_z = math.inf
     max_x = max_y = max_z = -math.inf
@@ -1,12 +1,28 @@
 """AoC 19, 2022."""
 
+import array
+import concurrent.futures
 import math
+import os
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
-
+from parsimonious.grammar import NodeVisitor
 import numpy as np
+import pebble
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+blueprint_format = re.compile(
+    r"Blueprint [0-9]+: "
+    r"Each ore robot costs ([0-9]+) ore. "
+    r"Each clay robot costs ([0-9]+) ore. "
+    r"Each obsidian robot costs ([0-9]+) ore and ([0-9]+) clay. "
+    r"Each geode robot costs ([0-9]+) ore and ([0-9]+) obsidian."
+)
 
 
 class InputVisitor(NodeVisitor):
@@ -37,8 +53,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = blueprint+
         blueprint = "Blueprint " integer ": " ore clay obsidian geode "\n"?
@@ -56,116 +72,235 @@ def parse_data(puzzle_input):
     return typed_input
 
 
-def t_until_next(costs, robots, resources):
-    result = []
-
-    for i in range(4):
-        missing_resources = costs[i] - resources
-
-        if np.all(missing_resources <= 0):
-            result.append(0)
-            continue
+def parse_fast(puzzle_input):
+    blueprints = []
 
-        mask = np.logical_and(costs[i] != 0, missing_resources > 0)
-
-        result.append(
-            np.array(
-                [
-                    int(np.ceil(a / b)) if b > 0 else np.inf
-                    for a, b in zip(missing_resources[mask], robots[mask])
-                ]
-            ).max()
+    for costs in match_lines(blueprint_format, puzzle_input):
+        ore, clay, obsidian_ore, obsidian_clay, geode_ore, geode_obsidian = map(
+            int, costs
         )
-
-    return result
-
-
-def resource_bounds(costs, robots, resources, time):
-    new_robots = np.zeros(4, np.int32)
-    new_resources = resources.copy()
-
-    for _ in range(time):
-        new_resources += robots + new_robots
-
-        for i in range(4):
-            if np.all(new_resources - costs[i] * (new_robots[i] + 1) >= 0):
-                new_robots[i] += 1
-
-    return new_resources
-
-
-def state_to_key(time, robots, resources):
-    return (
-        time,
-        robots[0],
-        robots[1],
-        robots[2],
-        robots[3],
-        resources[0],
-        resources[1],
-        resources[2],
-        resources[3],
-    )
-
-
-def simulate_blueprint(
-    costs,
-    time,
-    memory,
-    robots=np.array([1, 0, 0, 0], dtype=np.int32),
-    resources=np.array([0, 0, 0, 0], dtype=np.int32),
-    best=0,
-):
-    state_key = state_to_key(time, robots, resources)
-    if state_key in memory:
-        return memory[state_key]
-
-    if time <= 0:
-        return resources[3]
-
-    max_geodes = max(resources[3] + robots[3] * time, best)
-
-    t_until_resources = t_until_next(costs, robots, resources)
-    limits = np.ceil((np.max(costs * time, axis=0) - resources) / time).astype(np.int32)
-
-    for i, t_until_resource in list(enumerate(t_until_resources))[::-1]:
-        if i != 3 and robots[i] >= limits[i]:
-            continue
-
-        if t_until_resource == np.inf:
-            continue
-
-        build_time = int(math.ceil(t_until_resource)) + 1
-
-        if time - build_time < 0:
-            continue
-
-        new_robot = np.array([1 if n == i else 0 for n in range(4)], dtype=np.int32)
-
-        upper_bounds = resource_bounds(
-            costs,
-            robots + new_robot,
-            resources - costs[i] + robots * build_time,
-            time - build_time,
+        blueprints.append(
+            (ore, clay, (obsidian_ore, obsidian_clay), (geode_ore, geode_obsidian))
         )
 
-        if upper_bounds[3] < max_geodes:
-            continue
-
-        geodes = simulate_blueprint(
-            costs,
-            time - build_time,
-            memory,
-            robots + new_robot,
-            resources - costs[i] + robots * build_time,
-            max_geodes,
-        )
+    return blueprints
 
-        max_geodes = max(geodes, max_geodes)
 
-    memory[state_key] = max_geodes
-
-    return max_geodes
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
+# Bytes per table entry, a packed state key and the geodes
+TABLE_ENTRY_SIZE = 8 + 2
+DEFAULT_TABLE_BYTES = 1 << 24
+
+
+def pack_state(time, ore, clay, obsidian, ore_robots, clay_robots, obsidian_robots):
+    """Pack a search state into one int, the time in the lowest 6 bits.
+
+    Resources get 12 bits and robot counts 6 bits, which is plenty for the
+    robot caps and times of the puzzle. Raises ValueError for a state that
+    does not fit, rather than giving it the key of another state.
+    """
+    key = 0
+    for name, value, bits in (
+        ("ore", ore, 12),
+        ("clay", clay, 12),
+        ("obsidian", obsidian, 12),
+        ("ore_robots", ore_robots, 6),
+        ("clay_robots", clay_robots, 6),
+        ("obsidian_robots", obsidian_robots, 6),
+        ("time", time, 6),
+    ):
+        if not 0 <= value < 1 << bits:
+            raise ValueError(f"{name} {value} does not fit in {bits} bits")
+        key = (key << bits) | value
+    return key
+
+
+class TranspositionTable:
+    """Fixed size table of the most geodes a search state was reached with.
+
+    Every state key maps to one slot. When two states collide, the one with
+    more time left is kept, as it roots a larger part of the search.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_TABLE_BYTES):
+        self.size = max(1, max_bytes // TABLE_ENTRY_SIZE)
+        self.keys = array.array("q", [-1]) * self.size
+        self.geodes = array.array("h", [0]) * self.size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def seen(self, key, geodes):
+        """Check if the state was reached with as many geodes, then record it."""
+        # Fibonacci hashing spreads the packed fields over the slots
+        slot = ((key * 0x9E3779B97F4A7C15) >> 32) % self.size
+        stored_key = self.keys[slot]
+
+        if stored_key == key:
+            if self.geodes[slot] >= geodes:
+                self.hits += 1
+                return True
+            self.misses += 1
+            self.geodes[slot] = geodes
+            return False
+
+        self.misses += 1
+        if stored_key == -1 or key & 0x3F >= stored_key & 0x3F:
+            if stored_key != -1:
+                self.evictions += 1
+            self.keys[slot] = key
+            self.geodes[slot] = geodes
+        return False
+
+
+def triangular(n):
+    return n * (n + 1) // 2
+
+
+def geode_bound(time, obsidian, obsidian_robots, geode_obsidian):
+    """Upper bound of the geodes still to open, when ore and clay are free.
+
+    Every minute gets a new obsidian robot, and a geode robot whenever there
+    is obsidian for it.
+    """
+    bound = 0
+    for time_left in range(time - 1, -1, -1):
+        if obsidian >= geode_obsidian:
+            obsidian -= geode_obsidian
+            bound += time_left
+        obsidian += obsidian_robots
+        obsidian_robots += 1
+    return bound
+
+
+def max_geodes(blueprint, time, table=None, lower_bound=0):
+    """Most geodes the blueprint can open in the given time.
+
+    A depth first branch and bound over which robot to build next, skipping
+    the minutes spent waiting for its resources. The state is plain integers
+    and geodes are counted when a geode robot is built, for all the minutes
+    it has left. No more robots of a kind are built than can be spent in a
+    minute, and a branch is cut when building a geode robot on every
+    remaining minute could not beat the best so far, or when neither could
+    the robots the obsidian allows for, see geode_bound.
+
+    Given a new TranspositionTable, a state reached before with as many
+    geodes is not searched again, as far as the table remembers it and the
+    state fits pack_state. That pays off for long searches, from about 36
+    minutes. A known number of geodes the blueprint can open, such as from
+    beam_geodes, may be given as lower_bound to prune from the start.
+    """
+    (
+        ore_ore,
+        clay_ore,
+        (obsidian_ore, obsidian_clay),
+        (geode_ore, geode_obsidian),
+    ) = blueprint
+    max_ore_robots = max(clay_ore, obsidian_ore, geode_ore)
+    best = lower_bound
+
+    def wait_time(ore, ore_cost, ore_robots, other, other_cost, other_robots):
+        """Minutes until both costs are met, including the minute to build."""
+        wait = 0
+        if ore < ore_cost:
+            wait = -((ore - ore_cost) // ore_robots)
+        if other < other_cost:
+            wait = max(wait, -((other - other_cost) // other_robots))
+        return wait + 1
+
+    def search(
+        time, ore, clay, obsidian, ore_robots, clay_robots, obsidian_robots, geodes
+    ):
+        nonlocal best
+
+        if geodes > best:
+            best = geodes
+
+        # A new geode robot on every remaining minute opens 0 + 1 + ... + time - 1
+        if geodes + triangular(time - 1) <= best:
+            return
+
+        bound = geode_bound(time, obsidian, obsidian_robots, geode_obsidian)
+        if geodes + bound <= best:
+            return
+
+        if table is not None:
+            try:
+                key = pack_state(
+                    time, ore, clay, obsidian, ore_robots, clay_robots, obsidian_robots
+                )
+            except ValueError:
+                # Too long a search for the table, so search the state again
+                key = None
+            if key is not None and table.seen(key, geodes):
+                return
+
+        if obsidian_robots > 0:
+            wait = wait_time(
+                ore, geode_ore, ore_robots, obsidian, geode_obsidian, obsidian_robots
+            )
+            if wait < time:
+                search(
+                    time - wait,
+                    ore + ore_robots * wait - geode_ore,
+                    clay + clay_robots * wait,
+                    obsidian + obsidian_robots * wait - geode_obsidian,
+                    ore_robots,
+                    clay_robots,
+                    obsidian_robots,
+                    geodes + time - wait,
+                )
+
+        if clay_robots > 0 and obsidian_robots < geode_obsidian:
+            wait = wait_time(
+                ore, obsidian_ore, ore_robots, clay, obsidian_clay, clay_robots
+            )
+            if wait < time - 1:
+                search(
+                    time - wait,
+                    ore + ore_robots * wait - obsidian_ore,
+                    clay + clay_robots * wait - obsidian_clay,
+                    obsidian + obsidian_robots * wait,
+                    ore_robots,
+                    clay_robots,
+                    obsidian_robots + 1,
+                    geodes,
+                )
+
+        if clay_robots < obsidian_clay:
+            wait = wait_time(ore, clay_ore, ore_robots, 0, 0, 0)
+            if wait < time - 2:
+                search(
+                    time - wait,
+                    ore + ore_robots * wait - clay_ore,
+                    clay + clay_robots * wait,
+                    obsidian + obsidian_robots * wait,
+                    ore_robots,
+                    clay_robots + 1,
+                    obsidian_robots,
+                    geodes,
+                )
+
+        if ore_robots < max_ore_robots:
+            wait = wait_time(ore, ore_ore, ore_robots, 0, 0, 0)
+            if wait < time - 1:
+                search(
+                    time - wait,
+                    ore + ore_robots * wait - ore_ore,
+                    clay + clay_robots * wait,
+                    obsidian + obsidian_robots * wait,
+                    ore_robots + 1,
+                    clay_robots,
+                    obsidian_robots,
+                    geodes,
+                )
+
+    search(time, 0, 0, 0, 1, 0, 0, 0)
+
+    return best
 
 
 def blueprint_to_cost(blueprint):
@@ -182,28 +317,153 @@ def blueprint_to_cost(blueprint):
     )
 
 
-def part1(data):
-    """Solve part 1."""
-    quality_levels = []
+DEFAULT_BEAM_WIDTH = 200
+
+
+def beam_geodes(blueprints, time, beam_width=DEFAULT_BEAM_WIDTH, verify=False):
+    """Geodes of many blueprints at once, from a beam search in NumPy.
+
+    The states of all blueprints are stacked in one frontier, and advanced a
+    minute at a time by waiting or building any affordable robot. Duplicate
+    states and states with no more of any resource than a state with the
+    same robots are dropped, and only the beam_width most promising states of
+    every blueprint are kept. The result is a lower bound, exact with a wide
+    enough beam. With verify, the exact search is run from that bound.
+    """
+    costs = np.stack([blueprint_to_cost(blueprint) for blueprint in blueprints])
+    # No more robots of a kind than the most of its resource spent in a minute
+    max_robots = costs.max(axis=1)
+    max_robots[:, 3] = np.iinfo(np.int32).max
+    n_blueprints = len(blueprints)
+
+    ids = np.arange(n_blueprints, dtype=np.int32)
+    robots = np.zeros((n_blueprints, 4), dtype=np.int32)
+    robots[:, 0] = 1
+    resources = np.zeros((n_blueprints, 4), dtype=np.int32)
+
+    for time_left in range(time, 0, -1):
+        next_ids = [ids]
+        next_robots = [robots]
+        next_resources = [resources + robots]
+
+        for robot in range(4):
+            cost = costs[ids, robot]
+            can_build = np.all(resources >= cost, axis=1) & (
+                robots[:, robot] < max_robots[ids, robot]
+            )
+            built = robots[can_build].copy()
+            built[:, robot] += 1
+            next_ids.append(ids[can_build])
+            next_robots.append(built)
+            next_resources.append(
+                resources[can_build] - cost[can_build] + robots[can_build]
+            )
+
+        ids, robots, resources = prune_beam(
+            np.concatenate(next_ids),
+            np.concatenate(next_robots),
+            np.concatenate(next_resources),
+            time_left - 1,
+            beam_width,
+        )
 
-    for i, blueprint in enumerate(data):
-        costs = blueprint_to_cost(blueprint)
-        geodes = simulate_blueprint(costs, 24, {})
-        quality_levels.append((i + 1) * geodes)
+    geodes = np.zeros(n_blueprints, dtype=np.int64)
+    np.maximum.at(geodes, ids, resources[:, 3])
+    geodes = geodes.tolist()
 
-    return sum(quality_levels)
+    if verify:
+        geodes = [
+            max_geodes(blueprint, time, lower_bound=n)
+            for blueprint, n in zip(blueprints, geodes)
+        ]
 
+    return geodes
 
-def part2(data):
-    """Solve part 2."""
-    bp_geodes = []
 
-    for i, blueprint in enumerate(data[:3]):
-        costs = blueprint_to_cost(blueprint)
-        geodes = simulate_blueprint(costs, 32, {})
-        bp_geodes.append(geodes)
+def prune_beam(ids, robots, resources, time_left, beam_width):
+    """Drop duplicate and dominated states, keep the best of every blueprint."""
+    states = np.unique(np.column_stack((ids, robots, resources)), axis=0)
+    ids, robots, resources = states[:, 0], states[:, 1:5], states[:, 5:]
+
+    # Geodes at the end if no more robots are built, then the other resources
+    # counted the same way, as tie breakers
+    scores = resources + robots * time_left
+
+    # States of a blueprint with the same robots, the best score first
+    order = np.lexsort(
+        (*(-scores[:, i] for i in range(4)), *(robots[:, i] for i in range(4)), ids)
+    )
+    ids, robots, resources, scores = (
+        ids[order],
+        robots[order],
+        resources[order],
+        scores[order],
+    )
+    group_start = np.ones(len(ids), dtype=bool)
+    group_start[1:] = np.any(robots[1:] != robots[:-1], axis=1) | (ids[1:] != ids[:-1])
+    leaders = np.flatnonzero(group_start)[np.cumsum(group_start) - 1]
+    dominated = ~group_start & np.all(resources <= resources[leaders], axis=1)
+    ids, robots, resources, scores = (
+        ids[~dominated],
+        robots[~dominated],
+        resources[~dominated],
+        scores[~dominated],
+    )
+
+    # The beam_width best states of every blueprint
+    order = np.lexsort((*(-scores[:, i] for i in range(4)), ids))
+    ids, robots, resources = ids[order], robots[order], resources[order]
+    first = np.searchsorted(ids, ids, side="left")
+    in_beam = np.arange(len(ids)) - first < beam_width
+
+    return ids[in_beam], robots[in_beam], resources[in_beam]
+
+
+def evaluate_blueprints(blueprints, time, workers=1, timeout=None):
+    """Most geodes of every blueprint.
+
+    The blueprints are evaluated one by one unless more workers are asked
+    for, None for all cores, or a timeout is given. Then they are evaluated
+    in parallel on a process pool of at most one worker per blueprint, and
+    TimeoutError naming the blueprint is raised if one takes longer than
+    timeout seconds.
+    """
+    if workers == 1 and timeout is None:
+        return [max_geodes(blueprint, time) for blueprint in blueprints]
+
+    max_workers = min(workers or os.cpu_count(), max(1, len(blueprints)))
+    with pebble.ProcessPool(max_workers=max_workers) as pool:
+        futures = [
+            pool.schedule(max_geodes, args=(blueprint, time), timeout=timeout)
+            for blueprint in blueprints
+        ]
+
+        geodes = []
+        for i, future in enumerate(futures):
+            try:
+                geodes.append(future.result())
+            except concurrent.futures.TimeoutError:
+                for other in futures:
+                    other.cancel()
+                raise TimeoutError(
+                    f"Blueprint {i + 1} took longer than {timeout} seconds"
+                ) from None
+
+    return geodes
+
+
+def part1(data, workers=1, timeout=None):
+    """Solve part 1."""
+    geodes = evaluate_blueprints(data, 24, workers, timeout)
+
+    return sum((i + 1) * n for i, n in enumerate(geodes))
+
+
+def part2(data, workers=1, timeout=None):
+    """Solve part 2."""
+    geodes = evaluate_blueprints(data[:3], 32, workers, timeout)
 
-    return np.prod(bp_geodes)
+    return math.prod(geodes)
 
 
 def solve(puzzle_input):
@@ -26,6 +26,9 @@ def test_parse_example1(example1):
     """Test that input is parsed properly."""
     assert example1 == [(4, 2, (3, 14), (2, 7)), (2, 3, (3, 8), (3, 12))]
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202219.parse_fast(puzzle_input) == aoc202219.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
@@ -34,7 +37,49 @@ def test_part1_example1(example1):
 
 def test_part2_example1(example1):
     """Test part 2 on example input."""
-    assert aoc202219.part2(example1) == 51 * 62
+    assert aoc202219.part2(example1) == 56 * 62
+
+
+def test_part1_workers_example1(example1):
+    """Test part 1 with the blueprints evaluated on a process pool."""
+    assert aoc202219.part1(example1, workers=2) == 33
+    assert aoc202219.part1(example1, timeout=60) == 33
+
+
+def test_max_geodes_table(example1):
+    """Test the search with a transposition table too small for all states."""
+    table = aoc202219.TranspositionTable(max_bytes=1000)
+    assert aoc202219.max_geodes(example1[1], 32, table) == 62
+    assert table.hits > 0
+    assert table.evictions > 0
+
+
+def test_pack_state_range():
+    """Test that states too large for their fields are not packed."""
+    assert aoc202219.pack_state(63, 0, 0, 0, 1, 0, 0) != aoc202219.pack_state(
+        0, 0, 0, 0, 1, 0, 1
+    )
+
+    with pytest.raises(ValueError):
+        aoc202219.pack_state(64, 0, 0, 0, 1, 0, 0)
+    with pytest.raises(ValueError):
+        aoc202219.pack_state(10, 0, 4096, 0, 1, 0, 0)
+    with pytest.raises(ValueError):
+        aoc202219.pack_state(10, -1, 0, 0, 1, 0, 0)
+
+
+def test_max_geodes_table_long():
+    """Test that states too long for the table are searched without it."""
+    blueprint = (2, 2, (2, 3), (2, 3))
+    table = aoc202219.TranspositionTable(max_bytes=1000)
+    assert aoc202219.max_geodes(blueprint, 70, table) == 1770
+    assert aoc202219.max_geodes(blueprint, 70) == 1770
+
+
+def test_beam_geodes_example1(example1):
+    """Test the batched beam search on example input."""
+    assert aoc202219.beam_geodes(example1, 24) == [9, 12]
+    assert aoc202219.beam_geodes(example1, 32, beam_width=5, verify=True) == [56, 62]
 
 
 @pytest.mark.skip(reason="Not implemented")
@@ -1,71 +1,114 @@
 """AoC 20, 2022."""
 
+import bisect
+import itertools
+import math
 import pathlib
 import sys
 
-import numpy as np
-
 
 def parse_data(puzzle_input):
     """Parse input."""
     return [int(line) for line in puzzle_input.split("\n")]
 
 
-def mix(enc, perm):
-    for val_idx, val in enumerate(enc):
-        idx = np.argsort(perm)[val_idx]
-
-        steps = val % (len(enc) - 1)
-        new_idx = (idx + steps) % len(enc)
-
-        tmp = perm[idx]
-
-        if new_idx > idx:
-            perm[idx:new_idx] = perm[idx + 1 : new_idx + 1]
-            perm[new_idx] = tmp
-        elif new_idx + 1 < idx:
-            perm[new_idx + 2 : idx + 1] = perm[new_idx + 1 : idx]
-            perm[new_idx + 1] = tmp
-
-    return perm.copy()
+class MixingList:
+    """Circular list of the original positions of the numbers.
+
+    The positions are kept in blocks of about 4 sqrt(n), with the block of
+    every original position as a reverse index. Finding and moving a number
+    then touches one or two blocks, and the block sizes, with the list
+    operations of Python doing the work.
+    """
+
+    def __init__(self, n, block_size=None):
+        self.block_size = block_size or max(16, 4 * math.isqrt(n))
+        self.blocks = [
+            list(range(start, min(start + self.block_size, n)))
+            for start in range(0, n, self.block_size)
+        ]
+        self.sizes = [len(block) for block in self.blocks]
+        self.block_of = [i // self.block_size for i in range(n)]
+        # Blocks are numbered in the order they were made, order lists the
+        # block numbers in list order
+        self.order = list(range(len(self.blocks)))
+
+    def pop(self, i):
+        """Remove the original position i, return where it was in the list."""
+        block_id = self.block_of[i]
+        k = self.order.index(block_id)
+        block = self.blocks[block_id]
+        index = block.index(i)
+        del block[index]
+        self.sizes[k] -= 1
+        return sum(self.sizes[:k]) + index
+
+    def insert(self, index, i):
+        """Insert the original position i at index of the list."""
+        ends = list(itertools.accumulate(self.sizes))
+        k = min(bisect.bisect_left(ends, index), len(ends) - 1)
+        block_id = self.order[k]
+        block = self.blocks[block_id]
+        block.insert(index - (ends[k] - self.sizes[k]), i)
+        self.block_of[i] = block_id
+        self.sizes[k] += 1
+
+        if self.sizes[k] > 2 * self.block_size:
+            self.split(k)
+
+    def split(self, k):
+        block_id = self.order[k]
+        block = self.blocks[block_id]
+        new_block = block[self.block_size :]
+        del block[self.block_size :]
+
+        new_id = len(self.blocks)
+        self.blocks.append(new_block)
+        for i in new_block:
+            self.block_of[i] = new_id
+
+        self.order.insert(k + 1, new_id)
+        self.sizes[k] = len(block)
+        self.sizes.insert(k + 1, len(new_block))
+
+    def __iter__(self):
+        for block_id in self.order:
+            yield from self.blocks[block_id]
+
+
+def mix(numbers, rounds=1):
+    """Mix the numbers, return their original positions in mixed order."""
+    n = len(numbers)
+    mixing = MixingList(n)
+
+    for _ in range(rounds):
+        for i, number in enumerate(numbers):
+            index = mixing.pop(i)
+            mixing.insert((index + number) % (n - 1), i)
+
+    return list(mixing)
+
+
+def grove_coordinates(numbers, rounds=1):
+    order = mix(numbers, rounds)
+    zero_index = order.index(numbers.index(0))
+
+    return sum(
+        numbers[order[(zero_index + offset) % len(order)]]
+        for offset in (1000, 2000, 3000)
+    )
 
 
 def part1(data):
     """Solve part 1."""
-    enc = np.array(data, dtype=np.int32)
-    perm = np.array(range(len(enc)), dtype=np.uint16)
-
-    perm = mix(enc, perm)
-    idx = np.argmax(perm == np.argmax(enc == 0))
-
-    numbers = [
-        enc[perm[(idx + 1000) % len(enc)]],
-        enc[perm[(idx + 2000) % len(enc)]],
-        enc[perm[(idx + 3000) % len(enc)]],
-    ]
-
-    return sum(numbers)
+    return grove_coordinates(data)
 
 
 def part2(data):
     """Solve part 2."""
-    enc = np.array(data, dtype=np.int64)
-    perm = np.array(range(len(enc)), dtype=np.uint16)
-
-    enc *= 811589153
-
-    for _ in range(10):
-        perm = mix(enc, perm)
-
-    idx = np.argmax(perm == np.argmax(enc == 0))
-
-    numbers = [
-        enc[perm[(idx + 1000) % len(enc)]],
-        enc[perm[(idx + 2000) % len(enc)]],
-        enc[perm[(idx + 3000) % len(enc)]],
-    ]
+    numbers = [number * 811589153 for number in data]
 
-    return sum(numbers)
+    return grove_coordinates(numbers, rounds=10)
 
 
 def solve(puzzle_input):
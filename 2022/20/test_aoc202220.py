@@ -37,6 +37,18 @@ def test_part2_example1(example1):
     assert aoc202220.part2(example1) == 1623178306
 
 
+def test_mixing_list_small_blocks(example1):
+    """Test mixing with blocks small enough to be split."""
+    n = len(example1)
+    mixing = aoc202220.MixingList(n, block_size=1)
+    for i, number in enumerate(example1):
+        mixing.insert((mixing.pop(i) + number) % (n - 1), i)
+
+    mixed = [example1[i] for i in mixing]
+    start = mixed.index(1)
+    assert mixed[start:] + mixed[:start] == [1, 2, -3, 4, 0, 3, -2]
+
+
 @pytest.mark.skip(reason="Not implemented")
 def test_part2_example2(example2):
     """Test part 2 on example input."""
@@ -1,9 +1,16 @@
 """AoC 21, 2022."""
 
 import pathlib
+import re
 import sys
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, match_lines, parse_with_fallback
+
+monkey_format = re.compile(r"([a-z]{4}): (?:([0-9]+)|([a-z]{4}) ([-+*/]) ([a-z]{4}))")
 
 
 class InputVisitor(NodeVisitor):
@@ -28,8 +35,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = monkey+
         monkey = name ": " (integer / operation) "\n"?
@@ -46,6 +53,19 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    return [
+        (name, int(integer) if integer else (operand, left, right))
+        for name, integer, left, operand, right in match_lines(
+            monkey_format, puzzle_input
+        )
+    ]
+
+
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def input_to_dict(data):
     monkeys = {}
 
@@ -1,13 +1,27 @@
 """AoC 22, 2022."""
 
 import pathlib
+import re
 import sys
 
 from enum import Enum
 
 import numpy as np
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import (
+    FastParseError,
+    cached_grammar,
+    check_format,
+    grid_rows,
+    parse_with_fallback,
+)
+
+instructions_format = re.compile(r"(?:[0-9]+|[LR])+")
+instruction_format = re.compile(r"[0-9]+|[LR]")
 
 
 class Dir(Enum):
@@ -43,8 +57,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = grid "\n" instructions
         grid = grid_row+
@@ -62,6 +76,26 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    grid, separator, instructions = puzzle_input.partition("\n\n")
+    if not separator:
+        raise FastParseError("No instructions after the grid")
+
+    check_format(instructions_format, instructions)
+
+    return (
+        grid_rows(" .#", grid),
+        [
+            instruction if instruction in "LR" else int(instruction)
+            for instruction in instruction_format.findall(instructions)
+        ],
+    )
+
+
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def input_to_grid(data):
     n_rows = len(data)
     n_cols = max(len(row) for row in data)
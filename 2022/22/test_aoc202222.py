@@ -110,6 +110,9 @@ def test_parse_example1(example1):
         [10, "R", 5, "L", 5, "R", 10, "L", 4, "R", 5, "L", 5],
     )
 
+    puzzle_input = (PUZZLE_DIR / "example1.txt").read_text().rstrip()
+    assert aoc202222.parse_fast(puzzle_input) == aoc202222.parse_grammar(puzzle_input)
+
 
 def test_part1_example1(example1):
     """Test part 1 on example input."""
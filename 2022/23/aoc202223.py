@@ -8,7 +8,11 @@ from enum import Enum
 
 import numpy as np
 
-from parsimonious.grammar import Grammar, NodeVisitor
+from parsimonious.grammar import NodeVisitor
+
+# Shared helpers of the year
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parsing import cached_grammar, grid_rows, parse_with_fallback
 
 
 class Dir(Enum):
@@ -30,8 +34,8 @@ class InputVisitor(NodeVisitor):
         return visited_children or node
 
 
-def parse_data(puzzle_input):
-    input_grammar = Grammar(
+def parse_grammar(puzzle_input):
+    input_grammar = cached_grammar(
         r"""
         input = grid_row+
         grid_row = grid_cell+ "\n"?
@@ -45,6 +49,14 @@ def parse_data(puzzle_input):
     return typed_input
 
 
+def parse_fast(puzzle_input):
+    return grid_rows(".#", puzzle_input)
+
+
+def parse_data(puzzle_input):
+    return parse_with_fallback(puzzle_input, parse_fast, parse_grammar)
+
+
 def grid_bounds(grid):
     min_x = min_y = math.inf
     max_x = max_y = -math.inf
@@ -0,0 +1,59 @@
+"""Shared cycle detection for AoC 2022 simulations.
+
+A deterministic simulation whose whole future is decided by a hashable state
+repeats as soon as that state repeats. find_cycle runs a simulation until
+then, and the resulting Cycle extrapolates a growing value, such as the
+height of a tower, to any number of steps.
+"""
+
+# Standard library imports
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class Cycle:
+    # Steps before the cycle starts
+    prefix_len: int
+    # Steps in one cycle
+    period: int
+    # Growth of the value during one cycle
+    period_growth: int
+    # Value after 0, 1, ..., prefix_len + period steps
+    values: List[int]
+
+    def value_after(self, n_steps):
+        """Value after any number of steps."""
+        if n_steps < len(self.values):
+            return self.values[n_steps]
+
+        n_periods, rest = divmod(n_steps - self.prefix_len, self.period)
+        return self.values[self.prefix_len + rest] + n_periods * self.period_growth
+
+
+def find_cycle(step, state, value):
+    """Run step() until state() repeats.
+
+    step advances the simulation by one step, state returns a hashable key of
+    everything that decides the rest of the simulation and value returns the
+    value to extrapolate.
+    """
+    seen = {state(): 0}
+    values = [value()]
+
+    while True:
+        step()
+        values.append(value())
+        key = state()
+
+        if key in seen:
+            prefix_len = seen[key]
+            period = len(values) - 1 - prefix_len
+            return Cycle(
+                prefix_len=prefix_len,
+                period=period,
+                period_growth=values[-1] - values[prefix_len],
+                values=values,
+            )
+
+        seen[key] = len(values) - 1
@@ -0,0 +1,101 @@
+"""Shared input parsing for AoC 2022.
+
+The parsimonious grammars of the puzzles are the reference parsers. Next to
+the grammar, every puzzle has a fast parser built on compiled regular
+expressions and str.split that produces the same structure. The fast parser
+raises FastParseError for input it does not recognize, and the grammar is
+used instead.
+
+Grammars are compiled once per process through cached_grammar, which also
+keeps the compiled rules in an on-disk cache keyed by the grammar source.
+"""
+
+# Standard library imports
+import hashlib
+import importlib.metadata
+import os
+import pathlib
+import re
+import tempfile
+
+# Third party imports
+from parsimonious.grammar import Grammar
+
+try:
+    import dill as pickle
+except ImportError:
+    import pickle
+
+GRAMMAR_CACHE_DIR = pathlib.Path(__file__).parent / ".grammar_cache"
+
+_grammars = {}
+
+
+class FastParseError(ValueError):
+    """Input is not in the format the fast parser expects."""
+
+
+def parse_with_fallback(puzzle_input, fast_parser, reference_parser):
+    """Parse with the fast parser, fall back to the reference on a mismatch."""
+    try:
+        return fast_parser(puzzle_input)
+    except FastParseError:
+        return reference_parser(puzzle_input)
+
+
+def check_format(pattern, puzzle_input):
+    """Check that the whole input matches a compiled pattern."""
+    if pattern.fullmatch(puzzle_input) is None:
+        raise FastParseError(f"Input does not match {pattern.pattern!r}")
+
+
+def match_lines(pattern, puzzle_input, separator="\n"):
+    """Match every line against a compiled pattern, return the line groups."""
+    # A separator of "\n\n" matches blocks of lines, as in day 11 and 13
+    groups = []
+
+    for line in puzzle_input.split(separator):
+        match = pattern.fullmatch(line)
+        if match is None:
+            raise FastParseError(f"Line {line!r} does not match {pattern.pattern!r}")
+        groups.append(match.groups())
+
+    return groups
+
+
+def grid_rows(cells, puzzle_input):
+    """Split a grid of single character cells into rows of cells."""
+    cells = re.escape(cells)
+    check_format(re.compile(rf"[{cells}]+(?:\n[{cells}]+)*"), puzzle_input)
+    return [list(row) for row in puzzle_input.split("\n")]
+
+
+def cached_grammar(source):
+    """Get the compiled grammar for source, compiled at most once per process."""
+    if source in _grammars:
+        return _grammars[source]
+
+    # The pickled rules depend on the parsimonious version as well
+    version = importlib.metadata.version("parsimonious")
+    key = f"{version}\n{source}".encode()
+    cache_path = GRAMMAR_CACHE_DIR / f"{hashlib.sha256(key).hexdigest()}.pkl"
+
+    try:
+        grammar = pickle.loads(cache_path.read_bytes())
+    except Exception:
+        grammar = Grammar(source)
+        write_cache(cache_path, pickle.dumps(grammar))
+
+    _grammars[source] = grammar
+    return grammar
+
+
+def write_cache(cache_path, data):
+    """Write a cache file atomically, runs on a process pool share the cache."""
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as file:
+            file.write(data)
+        os.replace(file.name, cache_path)
+    except OSError:
+        pass
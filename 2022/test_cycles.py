@@ -0,0 +1,62 @@
+"""Tests for the shared cycle detection of AoC 2022."""
+
+# Local imports
+from cycles import find_cycle
+
+PREFIX_LEN = 3
+PERIOD = 4
+
+
+class Toy:
+    """States 0, 1, 2, then 3, 4, 5, 6 repeating, adding 2 * state + 1."""
+
+    def __init__(self):
+        self.steps = 0
+        self.total = 0
+
+    def state(self):
+        if self.steps < PREFIX_LEN:
+            return self.steps
+        return PREFIX_LEN + (self.steps - PREFIX_LEN) % PERIOD
+
+    def step(self):
+        self.total += 2 * self.state() + 1
+        self.steps += 1
+
+    def value(self):
+        return self.total
+
+
+def value_after(n_steps):
+    toy = Toy()
+    for _ in range(n_steps):
+        toy.step()
+    return toy.value()
+
+
+def test_find_cycle():
+    """Test that the prefix, period and growth of the cycle are found."""
+    toy = Toy()
+    cycle = find_cycle(toy.step, toy.state, toy.value)
+
+    assert cycle.prefix_len == PREFIX_LEN
+    assert cycle.period == PERIOD
+    assert cycle.period_growth == 7 + 9 + 11 + 13
+    assert len(cycle.values) == PREFIX_LEN + PERIOD + 1
+
+
+def test_value_after():
+    """Test extrapolation before, inside and far beyond the first cycle."""
+    toy = Toy()
+    cycle = find_cycle(toy.step, toy.state, toy.value)
+
+    for n_steps in [0, 1, PREFIX_LEN - 1, PREFIX_LEN, PREFIX_LEN + 2]:
+        assert cycle.value_after(n_steps) == value_after(n_steps)
+
+    for n_steps in range(PREFIX_LEN + PERIOD, 50):
+        assert cycle.value_after(n_steps) == value_after(n_steps)
+
+    # 1 + 3 + 5 in the prefix, 40 per period and 7 + 9 into the next one
+    n_periods = 10**12
+    n_steps = PREFIX_LEN + n_periods * PERIOD + 2
+    assert cycle.value_after(n_steps) == 1 + 3 + 5 + n_periods * 40 + 7 + 9
@@ -0,0 +1,210 @@
+"""Benchmark parse_data, part1 and part2 of all Advent of Code puzzles
+
+Every function is timed separately on example1.txt and input.txt, with warmup
+runs before the timed repeats. The min, median and p95 wall times are stored
+in a JSON history file keyed by git commit, and --compare flags the timings
+that regressed by more than a threshold against an earlier commit.
+
+Usage:
+
+    python benchmark.py [--year 2022] [--repeat 5] [--compare] [--compare-to COMMIT] [DAY ...]
+"""
+
+# Standard library imports
+import argparse
+import datetime
+import functools
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+# Local imports
+from run_puzzles import find_puzzles, input_param, load_module, read_input
+
+ROOT_DIR = pathlib.Path(__file__).parent
+HISTORY_PATH = ROOT_DIR / "benchmark_history.json"
+INPUT_NAMES = ("example1.txt", "input.txt")
+FUNCTIONS = ("parse_data", "part1", "part2")
+
+
+def git_commit():
+    """Get the current commit, marked dirty if there are local changes"""
+    return subprocess.run(
+        ["git", "describe", "--always", "--dirty"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+def percentile(times, percent):
+    if len(times) == 1:
+        return times[0]
+    return statistics.quantiles(times, n=100, method="inclusive")[percent - 1]
+
+
+def time_function(func, make_args, warmup, repeat, max_time):
+    """Time func, stop repeating early when max_time seconds have been spent"""
+    spent = 0.0
+    for _ in range(warmup):
+        if spent >= max_time:
+            break
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        spent += time.perf_counter() - start
+
+    times = []
+    total = 0.0
+    while len(times) < repeat and (not times or total < max_time):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+        total += times[-1]
+
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "p95": percentile(times, 95),
+        "runs": len(times),
+    }
+
+
+def parse_args(module, puzzle_input, extra):
+    """Parse the input again, so parts that modify it start from the same data"""
+    return [module.parse_data(puzzle_input), *extra]
+
+
+def benchmark_puzzle(path, input_name, warmup, repeat, max_time):
+    module = load_module(path)
+    puzzle_input = read_input(path.parent / input_name)
+    param = input_param(module, input_name)
+    results = {}
+
+    for func_name in FUNCTIONS:
+        func = getattr(module, func_name)
+        if func_name == "parse_data":
+            make_args = functools.partial(list, [puzzle_input])
+        else:
+            part = int(func_name[-1])
+            extra = [] if param is None else [param[part - 1]]
+            make_args = functools.partial(parse_args, module, puzzle_input, extra)
+
+        results[func_name] = time_function(func, make_args, warmup, repeat, max_time)
+        print(
+            f"Day {path.stem[-2:]} {input_name:12s} {func_name:10s} "
+            f"median {results[func_name]['median']:.6f}s",
+            flush=True,
+        )
+
+    return results
+
+
+def load_history():
+    try:
+        return json.loads(HISTORY_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(current, baseline, threshold):
+    """Find timings whose median is slower than the baseline by threshold"""
+    regressions = []
+    for key, timing in current.items():
+        if key not in baseline:
+            continue
+        old, new = baseline[key]["median"], timing["median"]
+        if old > 0 and (new - old) / old > threshold:
+            regressions.append((key, old, new))
+    return regressions
+
+
+def run(year, days, warmup, repeat, max_time, compare_to, threshold):
+    puzzles = find_puzzles(year)
+    if days:
+        puzzles = {day: path for day, path in puzzles.items() if day in days}
+
+    commit = git_commit()
+    history = load_history()
+    results = history.get(commit, {}).get("timings", {})
+
+    for day, path in puzzles.items():
+        for input_name in INPUT_NAMES:
+            if not (path.parent / input_name).exists():
+                continue
+            timings = benchmark_puzzle(path, input_name, warmup, repeat, max_time)
+            for func_name, timing in timings.items():
+                results[f"{year}/{day:02d}/{input_name}/{func_name}"] = timing
+
+    history[commit] = {"date": datetime.datetime.now().isoformat(), "timings": results}
+    HISTORY_PATH.write_text(json.dumps(history, indent=2, sort_keys=True))
+
+    if compare_to is None:
+        return 0
+
+    if compare_to == "":
+        # Compare to the last recorded commit other than the current one
+        older = [c for c in history if c != commit]
+        if not older:
+            print("No earlier benchmark to compare to")
+            return 0
+        compare_to = max(older, key=lambda c: history[c]["date"])
+    if compare_to not in history:
+        print(f"No benchmark recorded for {compare_to}")
+        return 1
+
+    regressions = compare(results, history[compare_to]["timings"], threshold)
+    print(f"\nCompared {commit} to {compare_to}:")
+    for key, old, new in regressions:
+        print(f"  REGRESSION {key}: {old:.6f}s -> {new:.6f}s ({new / old - 1:+.0%})")
+    if not regressions:
+        print(f"  No regressions above {threshold:.0%}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("days", nargs="*", type=int, help="days to run, default all")
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=10.0,
+        help="stop repeating a function after this many seconds",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="compare to the previous benchmark",
+    )
+    parser.add_argument(
+        "--compare-to", metavar="COMMIT", help="compare to the benchmark of a commit"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown of the median reported as a regression",
+    )
+    args = parser.parse_args()
+
+    sys.exit(
+        run(
+            year=args.year,
+            days=args.days,
+            warmup=args.warmup,
+            repeat=args.repeat,
+            max_time=args.max_time,
+            # An empty commit compares to the previous benchmark
+            compare_to="" if args.compare and not args.compare_to else args.compare_to,
+            threshold=args.threshold,
+        )
+    )
@@ -0,0 +1,97 @@
+"""Content-addressed cache of puzzle results
+
+Results are stored on disk, one JSON file per result, keyed by a hash of the
+puzzle input, the source code of the solution and any extra puzzle parameter.
+Changing either the input or the code gives a new key, so stale results are
+never returned. Entries are evicted least recently used first when the cache
+grows above its size limit.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+
+ROOT_DIR = pathlib.Path(__file__).parent
+CACHE_DIR = ROOT_DIR / ".result_cache"
+DEFAULT_MAX_SIZE = 1024 * 1024
+
+
+def source_hash(module_path):
+    """Hash the solution module with the local helpers it may import"""
+    sha = hashlib.sha256()
+    helper_paths = [
+        *sorted(module_path.parent.glob("*.py")),
+        *sorted(module_path.parent.parent.glob("*.py")),
+    ]
+    for path in helper_paths:
+        if path.name.startswith("test_"):
+            continue
+        sha.update(path.name.encode())
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def result_key(module_path, part, puzzle_input, puzzle_param=None):
+    """Key of one part of a puzzle solved on the given input"""
+    sha = hashlib.sha256()
+    sha.update(hashlib.sha256(puzzle_input.encode()).digest())
+    sha.update(source_hash(module_path).encode())
+    sha.update(repr(puzzle_param).encode())
+    sha.update(f"part{part}".encode())
+    return sha.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """Get a cached entry, or None if there is none"""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        # The modification time marks the last use for the LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry, and evict old entries if the cache is too large"""
+        self.cache_dir.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(entry, file)
+        os.replace(file.name, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_size"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
@@ -0,0 +1,215 @@
+"""Run all Advent of Code puzzles for one year on a process pool
+
+Discovers every aocYYYYDD.py module inside the year folder, and runs part 1
+and part 2 of each day as separate jobs on a ProcessPoolExecutor. Jobs are
+submitted longest first, using the wall times recorded by the previous run,
+so that the total wall time approaches the cost of the slowest part.
+
+Results are cached by input and source code hash, parts whose input and code
+have not changed since the last run are not solved again unless --no-cache is
+given.
+
+Usage:
+
+    python run_puzzles.py [--year 2022] [--input input.txt] [--workers N] [--no-cache] [DAY ...]
+"""
+
+# Standard library imports
+import argparse
+import concurrent.futures
+import importlib
+import json
+import os
+import pathlib
+import sys
+import time
+
+# Local imports
+from result_cache import DEFAULT_MAX_SIZE, ResultCache, result_key
+
+ROOT_DIR = pathlib.Path(__file__).parent
+TIMINGS_PATH = ROOT_DIR / ".run_timings.json"
+
+
+def find_puzzles(year):
+    """Find the solution modules for the given year, ordered by day"""
+    year_path = ROOT_DIR / str(year)
+    return {
+        int(path.stem[-2:]): path
+        for path in sorted(year_path.glob(f"*/aoc{year}[0-9][0-9].py"))
+    }
+
+
+def load_module(path):
+    """Import a solution module from its puzzle folder"""
+    module_dir = str(path.parent)
+    if module_dir not in sys.path:
+        # Solutions import helpers from their own folder, e.g. day 11 util
+        sys.path.insert(0, module_dir)
+    return importlib.import_module(path.stem)
+
+
+def read_input(path):
+    """Read puzzle input, keeping leading whitespace that day 5 depends on"""
+    return path.read_text().rstrip()
+
+
+def input_param(module, input_name):
+    """Get the extra (part 1, part 2) parameters for modules that need them"""
+    get_input_param = getattr(module, "get_input_param", None)
+    if get_input_param is None:
+        return None
+    return get_input_param(input_name)
+
+
+def solve_part(path, part, input_name):
+    """Parse input and solve one part of a puzzle, return result and timings"""
+    module = load_module(path)
+    puzzle_input = read_input(path.parent / input_name)
+
+    start = time.perf_counter()
+    data = module.parse_data(puzzle_input)
+    parse_time = time.perf_counter() - start
+
+    args = [data]
+    param = input_param(module, input_name)
+    if param is not None:
+        args.append(param[part - 1])
+
+    part_func = getattr(module, f"part{part}")
+    start = time.perf_counter()
+    result = part_func(*args)
+    part_time = time.perf_counter() - start
+
+    return str(result), parse_time, part_time
+
+
+def load_timings(input_name):
+    """Load the wall times recorded for the given input file"""
+    try:
+        timings = json.loads(TIMINGS_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+    return {
+        tuple(int(x) for x in key.split(".")): t
+        for key, t in timings.get(input_name, {}).items()
+    }
+
+
+def save_timings(input_name, timings):
+    try:
+        all_timings = json.loads(TIMINGS_PATH.read_text())
+    except (OSError, ValueError):
+        all_timings = {}
+    all_timings[input_name] = {
+        f"{day}.{part}": t for (day, part), t in sorted(timings.items())
+    }
+    TIMINGS_PATH.write_text(json.dumps(all_timings, indent=2))
+
+
+def schedule(jobs, timings):
+    """Order jobs by the wall time of the previous run, longest first"""
+    return sorted(jobs, key=lambda job: timings.get(job, 0.0), reverse=True)
+
+
+def cache_key(path, part, input_name):
+    module = load_module(path)
+    puzzle_input = read_input(path.parent / input_name)
+    param = input_param(module, input_name)
+    return result_key(
+        path, part, puzzle_input, None if param is None else param[part - 1]
+    )
+
+
+def run(year, days, input_name, workers, cache):
+    puzzles = find_puzzles(year)
+    if days:
+        puzzles = {day: path for day, path in puzzles.items() if day in days}
+
+    jobs = [
+        (day, part)
+        for day, path in puzzles.items()
+        if (path.parent / input_name).exists()
+        for part in (1, 2)
+    ]
+    timings = load_timings(input_name)
+    results = {}
+    failed = []
+    cached = set()
+    cache_keys = {}
+
+    if cache is not None:
+        for day, part in jobs:
+            key = cache_key(puzzles[day], part, input_name)
+            entry = cache.get(key)
+            if entry is None:
+                cache_keys[day, part] = key
+            else:
+                results[day, part] = tuple(entry)
+                cached.add((day, part))
+        jobs = [job for job in jobs if job not in cached]
+
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(solve_part, puzzles[day], part, input_name): (day, part)
+            for day, part in schedule(jobs, timings)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            day, part = futures[future]
+            try:
+                result, parse_time, part_time = future.result()
+            except Exception as err:
+                print(f"Day {day:2d} part {part}: failed: {err!r}")
+                failed.append((day, part))
+                continue
+            results[day, part] = (result, parse_time, part_time)
+            timings[day, part] = parse_time + part_time
+            if (day, part) in cache_keys:
+                cache.put(cache_keys[day, part], results[day, part])
+            print(f"Day {day:2d} part {part}: done in {parse_time + part_time:.3f}s")
+    total_time = time.perf_counter() - start
+
+    save_timings(input_name, timings)
+
+    print()
+    for day, part in sorted(results):
+        result, parse_time, part_time = results[day, part]
+        print(
+            f"Day {day:2d} part {part}: {result} "
+            f"(parse {parse_time:.3f}s, part {part_time:.3f}s"
+            f"{', cached' if (day, part) in cached else ''})"
+        )
+    print(f"\nTotal wall time: {total_time:.3f}s")
+
+    for day, part in sorted(failed):
+        print(f"Day {day:2d} part {part}: failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("days", nargs="*", type=int, help="days to run, default all")
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--input", default="input.txt", help="input file name")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--no-cache", action="store_true", help="solve again even if cached"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="maximum size of the result cache in bytes",
+    )
+    args = parser.parse_args()
+
+    success = run(
+        year=args.year,
+        days=args.days,
+        input_name=args.input,
+        workers=args.workers,
+        cache=None if args.no_cache else ResultCache(max_size=args.cache_size),
+    )
+    if not success:
+        sys.exit(1)
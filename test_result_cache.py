@@ -0,0 +1,84 @@
+"""Tests for the result cache."""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from result_cache import ResultCache, result_key
+
+
+@pytest.fixture
+def module_path(tmp_path):
+    """A puzzle module in a year folder, with a helper next to it."""
+    day_dir = tmp_path / "2022" / "01"
+    day_dir.mkdir(parents=True)
+    (day_dir / "aoc202201.py").write_text("def part1(data):\n    return 1\n")
+    (tmp_path / "2022" / "helpers.py").write_text("X = 1\n")
+    return day_dir / "aoc202201.py"
+
+
+def test_result_key_changes(module_path):
+    """Test that the key changes with the input, source, parameter and part."""
+    key = result_key(module_path, 1, "1\n2", 10)
+
+    assert result_key(module_path, 1, "1\n2", 10) == key
+    assert result_key(module_path, 2, "1\n2", 10) != key
+    assert result_key(module_path, 1, "1\n3", 10) != key
+    assert result_key(module_path, 1, "1\n2", 11) != key
+
+    module_path.write_text("def part1(data):\n    return 2\n")
+    assert result_key(module_path, 1, "1\n2", 10) != key
+
+
+def test_result_key_ignores_tests(module_path):
+    """Test that changing the tests of a puzzle keeps the key."""
+    key = result_key(module_path, 1, "1\n2")
+
+    (module_path.parent / "test_aoc202201.py").write_text("def test():\n    pass\n")
+    assert result_key(module_path, 1, "1\n2") == key
+
+    (module_path.parent.parent / "helpers.py").write_text("X = 2\n")
+    assert result_key(module_path, 1, "1\n2") != key
+
+
+def test_get_put(tmp_path):
+    """Test that stored entries are returned, and missing ones are None."""
+    cache = ResultCache(cache_dir=tmp_path / "cache")
+
+    assert cache.get("a") is None
+    cache.put("a", ["42", 0.5, 1.5])
+    assert cache.get("a") == ["42", 0.5, 1.5]
+
+
+def test_evict_least_recently_used(tmp_path):
+    """Test that the least recently used entries are evicted first."""
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(cache_dir=cache_dir, max_size=1024 * 1024)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, ["x" * 100])
+        # Distinct modification times, oldest first
+        os.utime(cache_dir / f"{key}.json", (1000 + i, 1000 + i))
+
+    # Reading a marks it as the most recently used
+    assert cache.get("a") is not None
+
+    entry_size = (cache_dir / "b.json").stat().st_size
+    cache.max_size = 2 * entry_size
+    cache.evict()
+
+    assert sorted(path.stem for path in cache_dir.glob("*.json")) == ["a", "c"]
+    assert cache.get("b") is None
+
+
+def test_put_evicts_above_max_size(tmp_path):
+    """Test that the cache stays within max_size as entries are added."""
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(cache_dir=cache_dir, max_size=1000)
+    for i in range(20):
+        cache.put(f"key{i}", ["x" * 100])
+
+    total_size = sum(path.stat().st_size for path in cache_dir.glob("*.json"))
+    assert 0 < total_size <= 1000